@@ -1,12 +1,22 @@
-from flask import Flask, request
+from flask import Flask, request, jsonify
 from flask_jwt_extended import JWTManager
 from flask_pymongo import PyMongo
 from flask_bcrypt import Bcrypt
+from pymongo.errors import PyMongoError
 from config import Config
 from routes.auth_routes import auth_bp, init_auth_routes
 from routes.gula_routes import gula_bp
 from routes.air_routes import air_bp
+from routes.katalog_routes import katalog_bp, init_katalog_routes
+from routes.dashboard_routes import dashboard_bp
+from routes.batch_routes import batch_bp
 from models.user_model import UserModel
+from models.katalog_model import KatalogModel
+from utils.katalog_index import KatalogIndex
+from utils.mongo_routing import init_mongo_routing, build_write_concern
+from utils.idempotency import init_idempotency
+from utils.login_buffer import LoginEventBuffer
+from utils.gula_arsip import ensure_arsip_indexes, ArsipCompactor
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -14,6 +24,20 @@ jwt = JWTManager()
 bcrypt = Bcrypt()
 mongo = PyMongo()
 
+def ensure_indexes(db):
+    # Dipakai juga oleh benchmarks/seed_data.py supaya index-nya sama persis
+    db.riwayat_gula.create_index([
+        ("user_id", 1),
+        ("waktuInput", -1)
+    ])
+    db.riwayat_air.create_index([
+        ("user_id", 1),
+        ("tanggal", 1)
+    ])
+
+    db.users.create_index("login_history.timestamp")
+    ensure_arsip_indexes(db)
+
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
@@ -21,35 +45,72 @@ def create_app():
     jwt.init_app(app)
     bcrypt.init_app(app)
     mongo.init_app(app)
+    init_mongo_routing(app, mongo)
 
     @app.before_request
     def attach_mongo_to_request():
         request.mongo = mongo
 
-    user_model_instance = UserModel(mongo.db)
-    init_auth_routes(user_model_instance, bcrypt)
+    user_model_instance = UserModel(
+        mongo.db.with_options(write_concern=build_write_concern(app.config))
+    )
+    login_buffer = LoginEventBuffer(
+        user_model_instance.log_login_batch,
+        max_size=app.config["LOGIN_BUFFER_MAX_SIZE"],
+        batch_size=app.config["LOGIN_BUFFER_BATCH_SIZE"],
+        flush_seconds=app.config["LOGIN_BUFFER_FLUSH_SECONDS"],
+        policy=app.config["LOGIN_BUFFER_POLICY"],
+        block_seconds=app.config["LOGIN_BUFFER_BLOCK_SECONDS"],
+    )
+    app.extensions["login_buffer"] = login_buffer
+    init_auth_routes(user_model_instance, bcrypt, login_buffer)
+
+    katalog_model_instance = KatalogModel(
+        mongo.db.with_options(write_concern=build_write_concern(app.config))
+    )
+    katalog_index_instance = KatalogIndex(
+        katalog_model_instance,
+        app.config["KATALOG_SNAPSHOT_PATH"],
+        refresh_seconds=app.config["KATALOG_REFRESH_SECONDS"],
+        overlay_max=app.config["KATALOG_OVERLAY_MAX"],
+    )
+    katalog_index_instance.load_or_build()
+    init_katalog_routes(katalog_model_instance, katalog_index_instance)
 
     # ✅ Register semua blueprint dengan prefix /api
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(gula_bp, url_prefix="/api")
     app.register_blueprint(air_bp, url_prefix="/api")
+    app.register_blueprint(katalog_bp, url_prefix="/api")
+    app.register_blueprint(dashboard_bp, url_prefix="/api")
+    app.register_blueprint(batch_bp, url_prefix="/api")
 
     # ✅ Tambahkan route untuk /api/
     @app.route("/api/")
     def api_root():
         return "ScanSek API Root 🧪"
 
+    # Route write me-raise ulang error Mongo (timeout, koneksi putus) supaya tidak disimpan
+    # sebagai response Idempotency-Key, dan client tahu request-nya aman di-retry
+    @app.errorhandler(PyMongoError)
+    def mongo_error(e):
+        return jsonify({"success": False, "message": f"Database sedang bermasalah, silakan coba lagi: {str(e)}"}), 503
+
     # ✅ Index MongoDB
-    mongo.db.riwayat_gula.create_index([
-        ("user_id", 1),
-        ("waktuInput", -1)
-    ])
-    mongo.db.riwayat_air.create_index([
-        ("user_id", 1),
-        ("tanggal", 1)
-    ])
+    ensure_indexes(mongo.db)
+    init_idempotency(
+        mongo.db,
+        app.config["IDEMPOTENCY_TTL_SECONDS"],
+        lock_seconds=app.config["IDEMPOTENCY_LOCK_SECONDS"],
+    )
 
-    mongo.db.users.create_index("login_history.timestamp")
+    if app.config["GULA_ARSIP_ENABLED"]:
+        ArsipCompactor(
+            mongo.db.with_options(write_concern=build_write_concern(app.config)),
+            bulan=app.config["GULA_ARSIP_BULAN"],
+            interval_seconds=app.config["GULA_ARSIP_INTERVAL_SECONDS"],
+            batch_size=app.config["GULA_ARSIP_BATCH_SIZE"],
+        ).start()
 
     @app.route("/")
     def index():
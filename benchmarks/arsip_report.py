@@ -0,0 +1,67 @@
+"""Laporan hemat storage & index dari bucket bulanan riwayat_gula.
+
+    python benchmarks/arsip_report.py --uri mongodb://localhost:27017 --db scansek_perf --compact
+
+Dengan --compact, kompaksi dijalankan sekali (butuh replica set untuk transaksi)
+dan ukuran sebelum/sesudah dibandingkan.
+"""
+import argparse
+import os
+import sys
+
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.gula_arsip import ARSIP, cutoff_arsip, ensure_arsip_indexes, kompaksi, laporan_storage
+
+
+def total(laporan):
+    return {
+        key: sum(laporan[name][key] for name in ("riwayat_gula", ARSIP))
+        for key in ("size", "storageSize", "totalIndexSize")
+    }
+
+
+def mb(n):
+    return f"{n / 1024 / 1024:8.2f} MB"
+
+
+def cetak(judul, laporan):
+    print(f"\n== {judul} ==")
+    for name in ("riwayat_gula", ARSIP):
+        r = laporan[name]
+        print(f"{name:<22} dok {r['count']:>9}  data {mb(r['size'])}  storage {mb(r['storageSize'])}  "
+              f"index {mb(r['totalIndexSize'])}")
+        for index, size in r["indexSizes"].items():
+            print(f"    {index:<30} {mb(size)}")
+    print(f"entri di bucket: {laporan[ARSIP]['entries']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri", default=os.getenv("PERF_MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="scansek_perf")
+    parser.add_argument("--bulan", type=int, default=3)
+    parser.add_argument("--compact", action="store_true")
+    args = parser.parse_args()
+
+    db = MongoClient(args.uri)[args.db]
+    ensure_arsip_indexes(db)
+
+    sebelum = laporan_storage(db)
+    cetak("sebelum", sebelum)
+    if not args.compact:
+        sys.exit(0)
+
+    dipindah = kompaksi(db, cutoff_arsip(args.bulan))
+    print(f"\n{dipindah} entri dipindah ke {ARSIP}")
+
+    sesudah = laporan_storage(db)
+    cetak("sesudah", sesudah)
+
+    a, b = total(sebelum), total(sesudah)
+    print("\n== hemat ==")
+    for key in ("size", "storageSize", "totalIndexSize"):
+        persen = (a[key] - b[key]) / a[key] * 100 if a[key] else 0
+        print(f"{key:<15} {mb(a[key])} -> {mb(b[key])}  ({persen:.1f}%)")
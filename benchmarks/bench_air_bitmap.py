@@ -0,0 +1,40 @@
+"""Bandingkan format riwayat_air lama ("HH:MM") vs bitmap menit: ukuran BSON dan waktu hitung statistik.
+
+Jalankan dari root repo:  python benchmarks/bench_air_bitmap.py
+"""
+import os
+import random
+import sys
+import time
+
+import bson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.air_bitmap import encode, menit_minum, statistik_hari
+
+
+def buat_hari(rng, n_hari, maks_minum):
+    for _ in range(n_hari):
+        yield sorted({f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}" for _ in range(rng.randint(1, maks_minum))})
+
+
+def ukur(label, docs, fn):
+    mulai = time.perf_counter()
+    for doc in docs:
+        fn(doc)
+    ms = (time.perf_counter() - mulai) * 1000
+    ukuran = sum(len(bson.encode(doc)) for doc in docs) / len(docs)
+    print(f"{label:<10} {ukuran:>10.1f} B/dok {ms:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    rng = random.Random(42)
+    for maks in (8, 24, 96):
+        hari = list(buat_hari(rng, 365 * 10, maks))
+        lama = [{"riwayatJamMinum": jam} for jam in hari]
+        bitmap = [{"menitMinum": encode(jam)} for jam in hari]
+
+        print(f"\n== {len(hari)} hari, maks {maks} minum/hari ==")
+        ukur("string", lama, lambda d: statistik_hari("", menit_minum(d)))
+        ukur("bitmap", bitmap, lambda d: statistik_hari("", menit_minum(d)))
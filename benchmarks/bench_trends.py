@@ -0,0 +1,67 @@
+"""Benchmark hitung_tren untuk riwayat multi-tahun.
+
+Jalankan dari root repo:  python benchmarks/bench_trends.py
+"""
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.gula_trends import hitung_tren, susun_seri, BATAS_GULA_HARIAN
+
+
+def buat_seri(tahun, seed=42):
+    rng = np.random.default_rng(seed)
+    awal = date(2026, 1, 1) - timedelta(days=365 * tahun)
+    seri = []
+    for i in range(365 * tahun):
+        if rng.random() < 0.15:
+            continue  # hari tanpa input
+        gula = float(rng.gamma(4.0, 12.0))
+        seri.append({
+            "_id": (awal + timedelta(days=i)).isoformat(),
+            "totalGula": gula,
+            "sendokTeh": gula / 4,
+        })
+    return seri
+
+
+def tren_loop(seri, batas=BATAS_GULA_HARIAN, window=7):
+    # Versi loop Python biasa, sebagai pembanding
+    per_hari = {s["_id"]: s["totalGula"] for s in seri}
+    awal = date.fromisoformat(seri[0]["_id"])
+    akhir = date.fromisoformat(seri[-1]["_id"])
+    nilai = []
+    d = awal
+    while d <= akhir:
+        nilai.append(per_hari.get(d.isoformat(), 0.0))
+        d += timedelta(days=1)
+
+    rata, streak, terpanjang = [], 0, 0
+    for i in range(len(nilai)):
+        jendela = nilai[max(0, i - window + 1):i + 1]
+        rata.append(sum(jendela) / len(jendela))
+        streak = streak + 1 if nilai[i] > batas else 0
+        terpanjang = max(terpanjang, streak)
+    return rata, terpanjang
+
+
+def ukur(fn, *args, ulang=20):
+    fn(*args)
+    mulai = time.perf_counter()
+    for _ in range(ulang):
+        fn(*args)
+    return (time.perf_counter() - mulai) / ulang * 1000
+
+
+if __name__ == "__main__":
+    print(f"{'tahun':>5} {'hari':>6} {'numpy (ms)':>11} {'loop (ms)':>10}")
+    for tahun in (1, 3, 5, 10):
+        seri = buat_seri(tahun)
+        t_np = ukur(lambda s: hitung_tren(susun_seri(s)), seri)
+        t_loop = ukur(tren_loop, seri)
+        print(f"{tahun:>5} {len(seri):>6} {t_np:>11.2f} {t_loop:>10.2f}")
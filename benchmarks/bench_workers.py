@@ -0,0 +1,128 @@
+"""Bandingkan worker gunicorn sync vs gevent: throughput dan memori per koneksi.
+
+Butuh MONGO_URI & JWT_SECRET_KEY yang valid (app di-start sungguhan). Contoh:
+
+    python benchmarks/bench_workers.py --path /api/dashboard --token <access_token> -c 200
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except FileNotFoundError:
+        pass
+    return 0
+
+
+def worker_pids(master_pid):
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            return [int(pid) for pid in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def start_server(worker_class, workers, port):
+    env = dict(os.environ,
+               GUNICORN_WORKER_CLASS=worker_class,
+               GUNICORN_WORKERS=str(workers),
+               GUNICORN_BIND=f"127.0.0.1:{port}")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return proc
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"gunicorn ({worker_class}) tidak bisa start")
+
+
+def load(url, headers, concurrency, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client():
+        s = requests.Session()
+        local = []
+        while time.monotonic() < stop_at:
+            mulai = time.perf_counter()
+            try:
+                r = s.get(url, headers=headers, timeout=30)
+                if r.status_code >= 500:
+                    raise RuntimeError(r.status_code)
+                local.append(time.perf_counter() - mulai)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    return threads, latencies, errors
+
+
+def run(worker_class, args):
+    proc = start_server(worker_class, args.workers, args.port)
+    try:
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+        url = f"http://127.0.0.1:{args.port}{args.path}"
+        base_rss = sum(rss_kb(pid) for pid in worker_pids(proc.pid))
+
+        threads, latencies, errors = load(url, headers, args.concurrency, args.duration)
+        time.sleep(args.duration / 2)
+        peak_rss = sum(rss_kb(pid) for pid in worker_pids(proc.pid))
+        for t in threads:
+            t.join()
+
+        latencies.sort()
+        n = len(latencies)
+        return {
+            "rps": n / args.duration,
+            "p50": latencies[n // 2] * 1000 if n else 0,
+            "p95": latencies[int(n * 0.95)] * 1000 if n else 0,
+            "errors": errors[0],
+            "kb_per_conn": max(peak_rss - base_rss, 0) / args.concurrency,
+            "rss_mb": peak_rss / 1024,
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="/api/")
+    parser.add_argument("--token")
+    parser.add_argument("-c", "--concurrency", type=int, default=100)
+    parser.add_argument("-d", "--duration", type=float, default=20)
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    print(f"{'worker':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'error':>6} {'RSS MB':>8} {'KB/conn':>8}")
+    for worker_class in ("sync", "gevent"):
+        r = run(worker_class, args)
+        print(f"{worker_class:>7} {r['rps']:>8.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} "
+              f"{r['errors']:>6} {r['rss_mb']:>8.1f} {r['kb_per_conn']:>8.1f}")
@@ -0,0 +1,229 @@
+"""Regresi query plan: jalankan semua bentuk query app lewat explain("executionStats").
+
+    python benchmarks/query_plans.py --tier all --uri mongodb://localhost:27017
+
+Setiap tier di-seed ulang (benchmarks/seed_data.py), lalu tiap query dicek:
+  - tidak ada COLLSCAN (kecuali yang memang full scan, ditandai allow_collscan)
+  - rasio docsExamined / nReturned (atau batas docsExamined) masih dalam budget
+Hasil & waktu per tier disimpan ke query_plans_<tier>.json. Exit code 1 kalau ada yang gagal.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.seed_data import TIERS, HARI_AKHIR, seed, user_oid
+from models.user_model import UserModel
+from models.katalog_model import KatalogModel
+from utils.gula_trends import pipeline_seri_harian
+from utils.gula_arsip import ARSIP, pipeline_entri_arsip
+from utils.air_bitmap import pipeline_statistik
+
+
+class _Result:
+    def __getattr__(self, name):
+        return 0
+
+
+class _RecordingCollection:
+    """Pengganti collection yang hanya mencatat filter dari method model, tanpa eksekusi."""
+
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    def _record(self, op, filter=None, *args, sort=None, **kwargs):
+        self.calls.append({"op": op, "collection": self.name, "filter": filter or {}, "sort": sort})
+        return None if op in ("find_one", "find_one_and_update") else _Result()
+
+    def __getattr__(self, op):
+        if op in ("create_index", "drop_index", "with_options"):
+            return lambda *a, **k: self
+        if op == "index_information":
+            return lambda *a, **k: {}
+        return lambda *a, **k: self._record(op, *a, **k)
+
+
+class _RecordingDb:
+    def __init__(self):
+        self.calls = []
+
+    def __getitem__(self, name):
+        return _RecordingCollection(name, self.calls)
+
+
+def model_shapes(method, *args, **kwargs):
+    db = _RecordingDb()
+    model_cls, name = method
+    getattr(model_cls(db), name)(*args, **kwargs)
+    return db.calls
+
+
+def build_shapes(cfg):
+    u = user_oid(0)
+    u_mid = user_oid(cfg["users"] // 2)
+    tanggal = (HARI_AKHIR - timedelta(days=3)).strftime("%Y-%m-%d")
+    awal = datetime.strptime(tanggal, "%Y-%m-%d")
+    akhir = awal + timedelta(days=1)
+    per_user = cfg["gula_per_user"]
+
+    shapes = [
+        # gula_routes
+        ("gula.ambil_gula semua", "riwayat_gula", {"user_id": u}, None, {"ratio": 1.1}),
+        ("gula.ambil_gula per tanggal", "riwayat_gula",
+         {"user_id": u_mid, "waktuInput": {"$gte": awal.isoformat(), "$lt": akhir.isoformat()}}, None, {"ratio": 1.1}),
+        # Regex tidak bisa pakai index, tapi scan harus tetap terbatas pada dokumen user itu
+        ("gula.ambil_gula search", "riwayat_gula",
+         {"user_id": u, "namaMakanan": {"$regex": "teh", "$options": "i"}}, None, {"max_examined": per_user * 1.1}),
+        ("gula.update/hapus_gula", "riwayat_gula", {"_id": None, "user_id": u}, None, {"ratio": 1.1}),
+        ("gula.versi", "gula_versi", {"_id": u}, None, {"ratio": 1.1}),
+        ("gula.tren_gula", "riwayat_gula", pipeline_seri_harian(u), "aggregate", {"ratio": 1.1}),
+        # air_routes
+        ("air.riwayat per tanggal", "riwayat_air", {"user_id": u_mid, "tanggal": tanggal}, None, {"ratio": 1.1}),
+        ("air.statistik 30 hari", "riwayat_air",
+         pipeline_statistik(u_mid, (HARI_AKHIR - timedelta(days=30)).strftime("%Y-%m-%d"), tanggal), "aggregate",
+         {"ratio": 1.1}),
+        # dashboard / idempotency
+        ("dashboard.login_history", "users", {"_id": u}, None, {"ratio": 1.1}),
+        ("idempotency.key", "idempotency_keys", {"_id": f"{u}:abc"}, None, {"ratio": 1.1}),
+        # bucket bulanan riwayat_gula
+        # bulan & entries._id diisi dari bucket hasil seed di check()
+        ("gula_arsip.per bulan", ARSIP, pipeline_entri_arsip(u, None), "aggregate", {"ratio": 1.1}),
+        ("gula_arsip.update/hapus entri", ARSIP, {"user_id": u, "entries._id": None}, None, {"ratio": 1.1}),
+    ]
+
+    # UserModel & KatalogModel: filter diambil langsung dari method-nya supaya selalu sinkron
+    model_calls = [
+        ("UserModel.find_by_email", (UserModel, "find_by_email"), ("user1@example.com",)),
+        ("UserModel.find_by_id", (UserModel, "find_by_id"), (str(u),)),
+        ("UserModel.verify_otp_and_mark_verified", (UserModel, "verify_otp_and_mark_verified"), ("user1@example.com", "000000")),
+        ("UserModel.request_otp", (UserModel, "request_otp"), ("user1@example.com", "000000", "reset")),
+        ("UserModel.update_profile", (UserModel, "update_profile"), (str(u), {"username": "x"})),
+        ("UserModel.delete_unverified_users", (UserModel, "delete_unverified_users"), ()),
+        ("KatalogModel.find_changed_since", (KatalogModel, "find_changed_since"), (HARI_AKHIR - timedelta(days=1),)),
+        ("KatalogModel.latest_update", (KatalogModel, "latest_update"), ()),
+        ("KatalogModel.find_all_active", (KatalogModel, "find_all_active"), ()),
+    ]
+    for name, method, args in model_calls:
+        for call in model_shapes(method, *args):
+            budget = {"ratio": 1.1}
+            if name == "KatalogModel.find_all_active":
+                # Build snapshot katalog memang membaca semua item aktif
+                budget = {"allow_collscan": True, "ratio": 1.1}
+            shapes.append((name, call["collection"], call["filter"], call["sort"], budget))
+
+    return shapes
+
+
+def _walk(node, key):
+    if isinstance(node, dict):
+        for k, v in node.items():
+            if k == key:
+                yield v
+            else:
+                yield from _walk(v, key)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk(item, key)
+
+
+def _stages(plan):
+    return sorted({s for s in _walk(plan, "stage") if isinstance(s, str)})
+
+
+def explain(db, collection, query, mode):
+    if mode == "aggregate":
+        cmd = {"aggregate": collection, "pipeline": query, "cursor": {}}
+    else:
+        cmd = {"find": collection, "filter": query}
+        if mode:
+            cmd["sort"] = dict(mode)
+            cmd["limit"] = 1
+    mulai = time.perf_counter()
+    result = db.command("explain", cmd, verbosity="executionStats")
+    wall_ms = (time.perf_counter() - mulai) * 1000
+
+    winning = list(_walk(result, "winningPlan"))
+    stats = next(_walk(result, "executionStats"), {})
+    return {
+        "stages": _stages(winning),
+        "docsExamined": stats.get("totalDocsExamined", 0),
+        "keysExamined": stats.get("totalKeysExamined", 0),
+        "nReturned": stats.get("nReturned", 0),
+        "executionMs": stats.get("executionTimeMillis", 0),
+        "wallMs": round(wall_ms, 2),
+    }
+
+
+def check(db, shapes):
+    sample_gula = db.riwayat_gula.find_one({"user_id": user_oid(0)}, {"_id": 1})
+    sample_bucket = db[ARSIP].find_one({"user_id": user_oid(0)}, {"bulan": 1, "entries": {"$slice": 1}})
+    if sample_bucket is None:
+        raise SystemExit(f"{ARSIP} kosong: seed ulang tanpa --no-seed supaya shape bucket teruji")
+    results = []
+    for name, collection, query, mode, budget in shapes:
+        if name == "gula.update/hapus_gula":
+            query = dict(query, _id=sample_gula["_id"] if sample_gula else None)
+        elif name == "gula_arsip.per bulan":
+            query = pipeline_entri_arsip(user_oid(0), sample_bucket["bulan"])
+        elif name == "gula_arsip.update/hapus entri":
+            query = dict(query, **{"entries._id": sample_bucket["entries"][0]["_id"]})
+
+        r = explain(db, collection, query, mode)
+        problems = []
+        if "COLLSCAN" in r["stages"] and not budget.get("allow_collscan"):
+            problems.append("COLLSCAN")
+        ratio = r["docsExamined"] / max(r["nReturned"], 1)
+        if "ratio" in budget and "max_examined" not in budget and ratio > budget["ratio"]:
+            problems.append(f"rasio examined/returned {ratio:.2f} > {budget['ratio']}")
+        if "max_examined" in budget and r["docsExamined"] > budget["max_examined"]:
+            problems.append(f"docsExamined {r['docsExamined']} > {budget['max_examined']:.0f}")
+
+        results.append(dict(r, name=name, collection=collection, ratio=round(ratio, 2),
+                            ok=not problems, problems=problems))
+    return results
+
+
+def print_table(tier, results):
+    print(f"\n== tier {tier} ==")
+    print(f"{'query':<42} {'stages':<28} {'exam':>7} {'ret':>7} {'ms':>6}  status")
+    for r in results:
+        status = "OK" if r["ok"] else "GAGAL: " + "; ".join(r["problems"])
+        stages = ",".join(s for s in r["stages"] if s not in ("FETCH", "PROJECTION_SIMPLE"))[:28]
+        print(f"{r['name']:<42} {stages:<28} {r['docsExamined']:>7} {r['nReturned']:>7} {r['executionMs']:>6}  {status}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tier", choices=list(TIERS) + ["all"], default="small")
+    parser.add_argument("--uri", default=os.getenv("PERF_MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="scansek_perf")
+    parser.add_argument("--no-seed", action="store_true", help="pakai data yang sudah ada")
+    parser.add_argument("--out-dir", default=".")
+    args = parser.parse_args()
+
+    db = MongoClient(args.uri)[args.db]
+    tiers = list(TIERS) if args.tier == "all" else [args.tier]
+    gagal = 0
+
+    for tier in tiers:
+        cfg = TIERS[tier]
+        if not args.no_seed:
+            mulai = time.perf_counter()
+            seed(db, tier)
+            print(f"seed {tier}: {time.perf_counter() - mulai:.1f} s")
+
+        results = check(db, build_shapes(cfg))
+        print_table(tier, results)
+        gagal += sum(not r["ok"] for r in results)
+
+        with open(os.path.join(args.out_dir, f"query_plans_{tier}.json"), "w") as f:
+            json.dump({"tier": tier, "config": cfg, "results": results}, f, indent=2, default=str)
+
+    sys.exit(1 if gagal else 0)
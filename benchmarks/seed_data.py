@@ -0,0 +1,161 @@
+"""Generator data sintetis yang deterministik untuk mongod lokal.
+
+    python benchmarks/seed_data.py --tier medium --uri mongodb://localhost:27017 --db scansek_perf
+
+Seed yang sama selalu menghasilkan data yang sama, jadi angka explain antar run bisa dibandingkan.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import ensure_indexes
+from models.user_model import UserModel
+from models.katalog_model import KatalogModel, normalisasi_nama
+from utils.idempotency import init_idempotency
+from utils.air_bitmap import encode
+from utils.gula_arsip import kompaksi
+
+TIERS = {
+    "small": {"users": 100, "gula_per_user": 50, "air_days": 30, "katalog": 500},
+    "medium": {"users": 1000, "gula_per_user": 200, "air_days": 180, "katalog": 2000},
+    "large": {"users": 5000, "gula_per_user": 500, "air_days": 365, "katalog": 10000},
+}
+
+MAKANAN = [
+    "Teh Botol", "Teh Kotak", "Kopi Susu", "Coca Cola", "Sprite", "Fanta", "Yakult",
+    "Susu Coklat", "Roti Manis", "Donat", "Martabak", "Es Campur", "Jus Mangga", "Pocari",
+]
+HARI_AKHIR = datetime(2026, 1, 1)
+BATCH = 5000
+
+
+def user_oid(i):
+    # _id deterministik supaya query plan suite bisa memilih user yang sama
+    return ObjectId(f"{i:024x}")
+
+
+def _insert(collection, docs):
+    buf = []
+    for doc in docs:
+        buf.append(doc)
+        if len(buf) >= BATCH:
+            collection.insert_many(buf, ordered=False)
+            buf = []
+    if buf:
+        collection.insert_many(buf, ordered=False)
+
+
+def gen_users(rng, n):
+    for i in range(n):
+        history = [
+            {"timestamp": (HARI_AKHIR - timedelta(hours=rng.randint(1, 24 * 365))).isoformat(),
+             "device": rng.choice(["android", "ios"])}
+            for _ in range(rng.randint(0, 20))
+        ]
+        verified = rng.random() > 0.05
+        doc = {
+            "_id": user_oid(i),
+            "email": f"user{i}@example.com",
+            "username": f"user{i}",
+            "password": "$2b$12$" + "x" * 53,
+            "is_verified": verified,
+            "otp_last_sent": None,
+            "otp_request_count": 0,
+            "login_history": history,
+        }
+        if not verified:
+            doc["otp"] = f"{rng.randint(100000, 999999)}"
+            doc["otp_purpose"] = "verifikasi"
+            doc["otp_expiry"] = HARI_AKHIR - timedelta(days=rng.randint(0, 5))
+        yield doc
+
+
+def gen_gula(rng, n_users, per_user, days):
+    for i in range(n_users):
+        for _ in range(per_user):
+            gula = rng.randint(1, 40)
+            jumlah = rng.randint(1, 3)
+            total = gula * jumlah
+            waktu = HARI_AKHIR - timedelta(minutes=rng.randint(0, days * 24 * 60))
+            yield {
+                "user_id": user_oid(i),
+                "namaMakanan": rng.choice(MAKANAN),
+                "gulaPerBungkus": gula,
+                "jumlahBungkus": jumlah,
+                "isiPerBungkus": rng.choice([None, 250, 330, 500]),
+                "totalGula": total,
+                "sendokTeh": round(total / 4, 2),
+                "sendokMakan": round(total / 12, 2),
+                "waktuInput": waktu.isoformat(),
+            }
+
+
+def gen_air(rng, n_users, days):
+    for i in range(n_users):
+        for d in range(days):
+            if rng.random() < 0.2:
+                continue
+            jam = sorted({f"{rng.randint(6, 22):02d}:{rng.choice([0, 15, 30, 45]):02d}" for _ in range(rng.randint(1, 10))})
+            yield {
+                "user_id": user_oid(i),
+                "tanggal": (HARI_AKHIR - timedelta(days=d)).strftime("%Y-%m-%d"),
+                "menitMinum": encode(jam),
+            }
+
+
+def gen_katalog(rng, n):
+    for i in range(n):
+        nama = f"{rng.choice(MAKANAN)} {i}"
+        yield {
+            "nama": nama,
+            "nama_key": normalisasi_nama(nama),
+            "gulaPerSaji": float(rng.randint(0, 60)),
+            "isiPerSaji": float(rng.choice([250, 330, 500])),
+            "satuan": "g",
+            "deleted": rng.random() < 0.02,
+            "updated_at": HARI_AKHIR - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+        }
+
+
+def seed(db, tier, seed_value=42):
+    cfg = TIERS[tier]
+    rng = random.Random(seed_value)
+
+    for name in ("users", "riwayat_gula", "riwayat_air", "katalog_makanan", "gula_versi", "idempotency_keys",
+                 "riwayat_gula_bulanan"):
+        db.drop_collection(name)
+
+    # Index dibuat lewat kode aplikasi yang sama
+    ensure_indexes(db)
+    UserModel(db)
+    KatalogModel(db)
+    init_idempotency(db, 86400)
+
+    _insert(db.users, gen_users(rng, cfg["users"]))
+    _insert(db.riwayat_gula, gen_gula(rng, cfg["users"], cfg["gula_per_user"], cfg["air_days"]))
+    _insert(db.riwayat_air, gen_air(rng, cfg["users"], cfg["air_days"]))
+    _insert(db.katalog_makanan, gen_katalog(rng, cfg["katalog"]))
+    _insert(db.gula_versi, ({"_id": user_oid(i), "v": 1} for i in range(cfg["users"])))
+    # Separuh riwayat gula yang lebih tua dipadatkan ke bucket bulanan, supaya shape bucket ikut teruji
+    kompaksi(db, HARI_AKHIR - timedelta(days=cfg["air_days"] // 2), transaksi=False)
+    return cfg
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tier", choices=TIERS, default="small")
+    parser.add_argument("--uri", default=os.getenv("PERF_MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="scansek_perf")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    cfg = seed(client[args.db], args.tier, args.seed)
+    print(f"Seed {args.tier} selesai: {cfg}")
@@ -1,12 +1,69 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 from datetime import timedelta
 
 load_dotenv()
 
 class Config:
+    # Untuk testing lokal pakai replica set 1 node:
+    #   mongod --replSet rs0 --dbpath ./data  lalu  mongosh --eval "rs.initiate()"
+    #   MONGO_URI=mongodb://localhost:27017/scansek?replicaSet=rs0
     MONGO_URI = os.getenv("MONGO_URI")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=10)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
 
+    # Read preference per endpoint (nama endpoint Flask: "<blueprint>.<fungsi>").
+    # Endpoint yang tidak terdaftar tetap baca dari primary.
+    MONGO_READ_PREFERENCES = {
+        "gula.ambil_gula": os.getenv("MONGO_READ_GULA", "secondaryPreferred"),
+        "gula.tren_gula": os.getenv("MONGO_READ_GULA", "secondaryPreferred"),
+        "air.get_riwayat_air": os.getenv("MONGO_READ_AIR", "secondaryPreferred"),
+        "air.statistik_air": os.getenv("MONGO_READ_AIR", "secondaryPreferred"),
+        "auth.get_login_history": os.getenv("MONGO_READ_LOGIN_HISTORY", "secondaryPreferred"),
+        "dashboard.dashboard": os.getenv("MONGO_READ_DASHBOARD", "secondaryPreferred"),
+    }
+    # Minimal 90 detik (batas dari MongoDB), -1 = tanpa batas
+    MONGO_MAX_STALENESS_SECONDS = int(os.getenv("MONGO_MAX_STALENESS_SECONDS", 90))
+
+    MONGO_WRITE_CONCERN_W = os.getenv("MONGO_WRITE_CONCERN_W", "majority")
+    MONGO_WRITE_CONCERN_J = os.getenv("MONGO_WRITE_CONCERN_J", "true").lower() == "true"
+    MONGO_WRITE_CONCERN_WTIMEOUT_MS = int(os.getenv("MONGO_WRITE_CONCERN_WTIMEOUT_MS", 5000))
+
+    # Snapshot index katalog (mmap), dipakai bersama oleh semua worker
+    KATALOG_SNAPSHOT_PATH = os.getenv(
+        "KATALOG_SNAPSHOT_PATH", os.path.join(tempfile.gettempdir(), "scansek_katalog.idx")
+    )
+    KATALOG_REFRESH_SECONDS = int(os.getenv("KATALOG_REFRESH_SECONDS", 30))
+    KATALOG_OVERLAY_MAX = int(os.getenv("KATALOG_OVERLAY_MAX", 500))
+    # Email (dipisah koma) yang boleh menambah/mengubah/menghapus katalog bersama
+    ADMIN_EMAILS = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
+
+    # Berapa lama response untuk Idempotency-Key disimpan
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 86400))
+    # Request yang masih diproses lebih lama dari ini dianggap mati (sebaiknya > GUNICORN_TIMEOUT)
+    IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", 60))
+
+    # Thread pool bersama untuk query Mongo paralel (dashboard, batch)
+    THREAD_POOL_WORKERS = int(os.getenv("THREAD_POOL_WORKERS", 8))
+
+    # Batas envelope /api/batch
+    BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", 20))
+    BATCH_MAX_BODY_BYTES = int(os.getenv("BATCH_MAX_BODY_BYTES", 256 * 1024))
+
+    # Write-behind buffer untuk /api/auth/log-login
+    LOGIN_BUFFER_MAX_SIZE = int(os.getenv("LOGIN_BUFFER_MAX_SIZE", 10000))
+    LOGIN_BUFFER_BATCH_SIZE = int(os.getenv("LOGIN_BUFFER_BATCH_SIZE", 500))
+    LOGIN_BUFFER_FLUSH_SECONDS = float(os.getenv("LOGIN_BUFFER_FLUSH_SECONDS", 2.0))
+    # drop_oldest | drop_newest | block (tunggu LOGIN_BUFFER_BLOCK_SECONDS lalu buang)
+    LOGIN_BUFFER_POLICY = os.getenv("LOGIN_BUFFER_POLICY", "drop_oldest")
+    LOGIN_BUFFER_BLOCK_SECONDS = float(os.getenv("LOGIN_BUFFER_BLOCK_SECONDS", 0.5))
+
+    # Entri riwayat_gula lebih tua dari N bulan dipadatkan ke bucket bulanan.
+    # Butuh transaksi (replica set), jadi default mati; di standalone compactor tidak di-start.
+    GULA_ARSIP_ENABLED = os.getenv("GULA_ARSIP_ENABLED", "false").lower() == "true"
+    # Juga dipakai read path untuk melewati query bucket; jangan dinaikkan setelah bucket terisi
+    GULA_ARSIP_BULAN = int(os.getenv("GULA_ARSIP_BULAN", 3))
+    GULA_ARSIP_INTERVAL_SECONDS = int(os.getenv("GULA_ARSIP_INTERVAL_SECONDS", 6 * 3600))
+    GULA_ARSIP_BATCH_SIZE = int(os.getenv("GULA_ARSIP_BATCH_SIZE", 1000))
@@ -0,0 +1,53 @@
+import multiprocessing
+import os
+import sys
+
+# Mode worker: "sync" (default) atau "gevent"
+#   GUNICORN_WORKER_CLASS=gevent gunicorn -c gunicorn.conf.py wsgi:app
+# Env var ini satu-satunya cara yang didukung: wsgi.py memakainya untuk monkey-patch lebih awal.
+# `-k gevent` tanpa env var ditolak saat worker boot (lihat post_worker_init).
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+
+if worker_class == "gevent":
+    # Satu worker gevent menangani banyak koneksi, cukup 1 per core
+    workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+    worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+else:
+    workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+
+
+def _pakai_gevent(nama_worker):
+    return "gevent" in str(nama_worker).lower()
+
+
+def post_worker_init(worker):
+    # Yang dicek worker class efektif (bisa dioverride -k di command line), bukan hanya env var
+    efektif = worker.cfg.worker_class_str
+    if _pakai_gevent(efektif) != _pakai_gevent(os.getenv("GUNICORN_WORKER_CLASS", "sync")):
+        worker.log.error(
+            "Worker class %s tidak sesuai GUNICORN_WORKER_CLASS=%s; set GUNICORN_WORKER_CLASS "
+            "(jangan pakai -k) supaya wsgi.py monkey-patch sebelum app di-import",
+            efektif, os.getenv("GUNICORN_WORKER_CLASS", "sync")
+        )
+        sys.exit(3)
+    if not _pakai_gevent(efektif):
+        return
+
+    from utils.cooperative import cek_kompatibilitas_gevent
+
+    masalah = cek_kompatibilitas_gevent()
+    for pesan in masalah:
+        worker.log.error("Gevent tidak kompatibel: %s", pesan)
+    if masalah:
+        # Exit code 3 = WORKER_BOOT_ERROR, master gunicorn ikut berhenti
+        sys.exit(3)
+    worker.log.info("Gevent aktif, pymongo/requests/bcrypt terverifikasi kompatibel")
+
+
+def worker_exit(server, worker):
+    # Flush event login yang masih di buffer sebelum worker mati
+    buffer = getattr(worker, "wsgi", None) and worker.wsgi.extensions.get("login_buffer")
+    if buffer is not None:
+        buffer.close()
@@ -0,0 +1,81 @@
+from bson.objectid import ObjectId
+from datetime import datetime
+
+
+def normalisasi_nama(nama):
+    return " ".join(nama.lower().split())
+
+
+class KatalogModel:
+    def __init__(self, db):
+        self.collection = db["katalog_makanan"]
+        # nama_key unik di antara item aktif supaya satu produk tidak dobel; item yang sudah
+        # di-soft delete tidak menghalangi nama yang sama dipakai lagi
+        if "nama_key_1" in self.collection.index_information():
+            self.collection.drop_index("nama_key_1")  # versi lama: unik termasuk item terhapus
+        self.collection.create_index(
+            "nama_key",
+            unique=True,
+            partialFilterExpression={"deleted": False},
+            name="nama_key_aktif"
+        )
+        self.collection.create_index("updated_at")
+
+    def find_by_id(self, katalog_id):
+        return self.collection.find_one({"_id": ObjectId(katalog_id), "deleted": False})
+
+    def insert_item(self, nama, gula_per_saji, isi_per_saji=None, satuan="g"):
+        data = {
+            "nama": nama.strip(),
+            "nama_key": normalisasi_nama(nama),
+            "gulaPerSaji": gula_per_saji,
+            "isiPerSaji": isi_per_saji,
+            "satuan": satuan,
+            "deleted": False,
+            "updated_at": datetime.utcnow()
+        }
+        return self.collection.insert_one(data).inserted_id
+
+    def update_item(self, katalog_id, updates):
+        update_data = {}
+        if "nama" in updates:
+            update_data["nama"] = updates["nama"].strip()
+            update_data["nama_key"] = normalisasi_nama(updates["nama"])
+        for field in ("gulaPerSaji", "isiPerSaji", "satuan"):
+            if field in updates:
+                update_data[field] = updates[field]
+
+        if not update_data:
+            return 0
+
+        update_data["updated_at"] = datetime.utcnow()
+        return self.collection.update_one(
+            {"_id": ObjectId(katalog_id), "deleted": False},
+            {"$set": update_data}
+        ).matched_count
+
+    def delete_item(self, katalog_id):
+        # Soft delete, supaya index di worker lain bisa ikut menghapus secara incremental
+        return self.collection.update_one(
+            {"_id": ObjectId(katalog_id), "deleted": False},
+            {"$set": {"deleted": True, "updated_at": datetime.utcnow()}}
+        ).modified_count
+
+    def find_all_active(self):
+        return self.collection.find(
+            {"deleted": False},
+            {"nama": 1, "nama_key": 1, "gulaPerSaji": 1, "isiPerSaji": 1, "updated_at": 1}
+        )
+
+    def find_changed_since(self, since):
+        query = {}
+        if since is not None:
+            query["updated_at"] = {"$gte": since}
+        return self.collection.find(
+            query,
+            {"nama": 1, "nama_key": 1, "gulaPerSaji": 1, "isiPerSaji": 1, "deleted": 1, "updated_at": 1}
+        )
+
+    def latest_update(self):
+        doc = self.collection.find_one({}, {"updated_at": 1}, sort=[("updated_at", -1)])
+        return doc["updated_at"] if doc else None
@@ -1,18 +1,53 @@
 from flask_bcrypt import generate_password_hash, check_password_hash
 from bson.objectid import ObjectId
+from pymongo import UpdateOne, ReturnDocument
 from datetime import datetime, timedelta
+from utils.cooperative import run_blocking
+from utils.mongo_routing import build_read_concern
+
+OTP_BERLAKU = timedelta(minutes=5)
+OTP_JENDELA_LIMIT = timedelta(minutes=5)
+OTP_MAKS_PERMINTAAN = 3
+PROYEKSI_PROFIL = {"username": 1, "email": 1, "password": 1, "is_verified": 1}
+# Dedup event_id cukup dibanding ekor login_history: retry buffer terjadi beberapa detik
+# setelah flush gagal, jadi event yang sudah masuk pasti ada di entri-entri terakhir
+LOGIN_DEDUP_EKOR = 100
+
+
+def login_history_publik(history):
+    """Buang field internal (event_id) sebelum login_history dikirim ke client."""
+    return [{"timestamp": h.get("timestamp"), "device": h.get("device")} for h in history or []]
+
 
 class UserModel:
     def __init__(self, db):
         self.collection = db["users"]
         # Buat index email unik
         self.collection.create_index("email", unique=True)
+        # Untuk delete_unverified_users, hanya dokumen belum verifikasi yang masuk index
+        self.collection.create_index(
+            "otp_expiry",
+            partialFilterExpression={"is_verified": False}
+        )
 
     def find_by_email(self, email):
         return self.collection.find_one({"email": email})
 
-    def find_by_id(self, user_id):
-        return self.collection.find_one({"_id": ObjectId(user_id)})
+    def find_by_id(self, user_id, projection=None):
+        return self.collection.find_one({"_id": ObjectId(user_id)}, projection)
+
+    def find_login_history(self, user_id, read_preference=None, session=None):
+        collection = self.collection
+        if read_preference is not None:
+            collection = collection.with_options(
+                read_preference=read_preference,
+                read_concern=build_read_concern(read_preference),
+            )
+        return collection.find_one(
+            {"_id": ObjectId(user_id)},
+            {"login_history": 1},
+            session=session
+        )
 
     def insert_user(self, email, username, password_hashed=None, otp=None, otp_purpose=None):
         data = {
@@ -34,7 +69,7 @@ class UserModel:
         return self.collection.insert_one(data).inserted_id
 
     def verify_password(self, plain_pw, hashed_pw):
-        return check_password_hash(hashed_pw, plain_pw)
+        return run_blocking(check_password_hash, hashed_pw, plain_pw)
 
     def update_user(self, user_id, updates):
         update_data = {}
@@ -44,7 +79,7 @@ class UserModel:
         if "email" in updates:
             update_data["email"] = updates["email"]
         if "password" in updates:
-            update_data["password"] = generate_password_hash(updates["password"]).decode("utf-8")
+            update_data["password"] = run_blocking(generate_password_hash, updates["password"]).decode("utf-8")
 
         if not update_data:
             return 0
@@ -85,10 +120,102 @@ class UserModel:
     def reset_password(self, email, new_password):
         return self.collection.update_one(
             {"email": email},
-            {"$set": {"password": generate_password_hash(new_password).decode("utf-8")},
+            {"$set": {"password": run_blocking(generate_password_hash, new_password).decode("utf-8")},
              "$unset": {"otp": "", "otp_expiry": "", "otp_purpose": ""}}
         ).modified_count
 
+    def verify_otp_and_mark_verified(self, email, otp_input, purpose="verifikasi"):
+        # Cek OTP, purpose & expiry di filter lalu tandai verified dalam satu round trip
+        return self.collection.find_one_and_update(
+            {
+                "email": email,
+                "otp": otp_input,
+                "otp_purpose": purpose,
+                "otp_expiry": {"$gt": datetime.utcnow()}
+            },
+            {"$set": {"is_verified": True}, "$unset": {"otp": "", "otp_expiry": "", "otp_purpose": ""}},
+            projection=PROYEKSI_PROFIL,
+            return_document=ReturnDocument.AFTER
+        )
+
+    def reset_password_with_otp(self, email, otp_input, new_password):
+        hashed = run_blocking(generate_password_hash, new_password).decode("utf-8")
+        return self.collection.find_one_and_update(
+            {
+                "email": email,
+                "otp": otp_input,
+                "otp_purpose": "reset",
+                "otp_expiry": {"$gt": datetime.utcnow()}
+            },
+            {"$set": {"password": hashed}, "$unset": {"otp": "", "otp_expiry": "", "otp_purpose": ""}},
+            projection={"_id": 1},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def request_otp(self, email, otp_code, purpose, only_unverified=False):
+        """Set OTP baru sekaligus cek & naikkan rate limit secara atomik.
+
+        Mengembalikan dokumen user (setelah update) atau None kalau user tidak ada,
+        sudah terverifikasi (only_unverified) atau kena limit.
+        """
+        now = datetime.utcnow()
+        jendela = now - OTP_JENDELA_LIMIT
+        masih_dalam_jendela = {"$gte": [{"$ifNull": ["$otp_last_sent", datetime(1970, 1, 1)]}, jendela]}
+
+        query = {
+            "email": email,
+            "$or": [
+                {"otp_last_sent": {"$not": {"$gte": jendela}}},
+                {"otp_request_count": {"$lt": OTP_MAKS_PERMINTAAN}}
+            ]
+        }
+        if only_unverified:
+            query["is_verified"] = {"$ne": True}
+
+        return self.collection.find_one_and_update(
+            query,
+            [{"$set": {
+                "otp": otp_code,
+                "otp_expiry": now + OTP_BERLAKU,
+                "otp_purpose": purpose,
+                "otp_request_count": {"$cond": [
+                    masih_dalam_jendela,
+                    {"$add": [{"$ifNull": ["$otp_request_count", 0]}, 1]},
+                    1
+                ]},
+                "otp_last_sent": now
+            }}],
+            projection={"email": 1, "otp_request_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def upsert_google_user(self, email, username):
+        # Buat user baru (belum verifikasi) kalau belum ada, sekaligus ambil datanya
+        return self.collection.find_one_and_update(
+            {"email": email},
+            {"$setOnInsert": {
+                "email": email,
+                "username": username,
+                "is_verified": False,
+                "otp_last_sent": None,
+                "otp_request_count": 0,
+                "login_history": []
+            }},
+            projection=PROYEKSI_PROFIL,
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    def update_profile(self, user_id, updates, current_password_hash=None):
+        query = {"_id": ObjectId(user_id)}
+        if current_password_hash is not None:
+            # Pastikan password tidak berubah sejak dicek (tanpa race)
+            query["password"] = current_password_hash
+        return self.collection.update_one(query, {"$set": updates})
+
+    def delete_by_email(self, email):
+        return self.collection.delete_one({"email": email}).deleted_count
+
     def delete_unverified_users(self, days=1):
         cutoff = datetime.utcnow() - timedelta(days=days)
         result = self.collection.delete_many({
@@ -97,7 +224,7 @@ class UserModel:
         })
         return result.deleted_count
 
-    def log_login_activity(self, user_id, timestamp, device_info):
+    def log_login_activity(self, user_id, timestamp, device_info, session=None):
         return self.collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$push": {
@@ -105,7 +232,41 @@ class UserModel:
                     "timestamp": timestamp,
                     "device": device_info
                 }
-            }}
+            }},
+            session=session
         )
 
+    def log_login_batch(self, events):
+        # Satu UpdateOne per user, dikirim sekali lewat bulk_write. bulk_write unordered bisa
+        # sukses sebagian lalu di-retry utuh oleh buffer, jadi event yang event_id-nya sudah
+        # ada di ekor login_history dilewati (idempotent), bukan di-$push dobel.
+        per_user = {}
+        for event in events:
+            per_user.setdefault(event["user_id"], []).append({
+                "event_id": event["event_id"],
+                "timestamp": event["timestamp"],
+                "device": event["device"]
+            })
+
+        if not per_user:
+            return None
 
+        return self.collection.bulk_write([
+            UpdateOne({"_id": user_id}, [{"$set": {"login_history": {"$concatArrays": [
+                {"$ifNull": ["$login_history", []]},
+                {"$filter": {
+                    "input": {"$literal": history},
+                    "cond": {"$not": [{"$in": [
+                        "$$this.event_id",
+                        {"$let": {
+                            "vars": {"ekor": {"$slice": [
+                                {"$ifNull": ["$login_history", []]},
+                                -(len(history) + LOGIN_DEDUP_EKOR)
+                            ]}},
+                            "in": "$$ekor.event_id"
+                        }}
+                    ]}]}
+                }}
+            ]}}}])
+            for user_id, history in per_user.items()
+        ], ordered=False)
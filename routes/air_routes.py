@@ -1,14 +1,25 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson.objectid import ObjectId
+from pymongo.errors import PyMongoError
+from utils.mongo_routing import get_db, get_session
+from utils.idempotency import idempotent
+from utils.air_bitmap import (
+    jam_minum, menit_minum, parse_jam, update_set, update_unset, filter_ada_jam,
+    pipeline_statistik, statistik_hari, ringkas_statistik, FIELD_BITMAP, FIELD_LAMA
+)
 from datetime import datetime
 
+# Batas rentang /air/statistik supaya satu request tidak decode bertahun-tahun data
+MAKS_HARI_STATISTIK = 366
+
 air_bp = Blueprint("air", __name__)
 
 @air_bp.route("/air", methods=["GET"])
 @jwt_required()
 def get_riwayat_air():
-    db = request.mongo.db
+    db = get_db()
+    session = get_session()
     user_id = get_jwt_identity()
     tanggal = request.args.get("tanggal")
 
@@ -19,11 +30,14 @@ def get_riwayat_air():
         data = db.riwayat_air.find_one({
             "user_id": ObjectId(user_id),
             "tanggal": tanggal
-        })
+        }, session=session)
 
         if data:
             data["_id"] = str(data["_id"])
             data["user_id"] = str(data["user_id"])
+            # Bitmap tetap dikembalikan sebagai list "HH:MM" seperti sebelumnya
+            data["riwayatJamMinum"] = jam_minum(data)
+            data.pop(FIELD_BITMAP, None)
             return jsonify({"success": True, "data": data}), 200
         else:
             return jsonify({"success": True, "data": {
@@ -37,8 +51,10 @@ def get_riwayat_air():
 
 @air_bp.route("/air", methods=["POST"])
 @jwt_required()
+@idempotent
 def tambah_jam_minum():
-    db = request.mongo.db
+    db = get_db()
+    session = get_session()
     user_id = get_jwt_identity()
     data = request.json
 
@@ -49,51 +65,66 @@ def tambah_jam_minum():
         return jsonify({"success": False, "message": "Tanggal dan jam harus diisi"}), 400
 
     try:
-        datetime.strptime(jam, "%H:%M")
+        update = update_set(jam)  # $bit or: set bit menit itu, otomatis anti-duplikat
     except ValueError:
         return jsonify({"success": False, "message": "Format jam tidak valid (HH:mm)"}), 400
 
     try:
         db.riwayat_air.update_one(
             {"user_id": ObjectId(user_id), "tanggal": tanggal},
-            {"$addToSet": {"riwayatJamMinum": jam}},  # anti-duplikat
-            upsert=True
+            update,
+            upsert=True,
+            session=session
         )
         return jsonify({"success": True, "message": "Jam minum berhasil ditambahkan"}), 201
+    except PyMongoError:
+        raise
     except Exception as e:
         return jsonify({"success": False, "message": f"Gagal tambah jam: {str(e)}"}), 400
 
 
 @air_bp.route("/air/<tanggal>", methods=["DELETE"])
 @jwt_required()
+@idempotent
 def hapus_riwayat_air(tanggal):
-    db = request.mongo.db
+    db = get_db()
+    session = get_session()
     user_id = get_jwt_identity()
 
     try:
         result = db.riwayat_air.delete_one({
             "user_id": ObjectId(user_id),
             "tanggal": tanggal
-        })
+        }, session=session)
 
         if result.deleted_count == 0:
             return jsonify({"success": False, "message": "Data tidak ditemukan"}), 404
 
         return jsonify({"success": True, "message": "Data berhasil dihapus"}), 200
+    except PyMongoError:
+        raise
     except Exception as e:
         return jsonify({"success": False, "message": f"Gagal hapus data: {str(e)}"}), 400
 
 
 @air_bp.route("/air/<tanggal>/<jam>", methods=["DELETE"])
 @jwt_required()
+@idempotent
 def hapus_jam_tertentu(tanggal, jam):
-    db = request.mongo.db
+    db = get_db()
+    session = get_session()
     user_id = get_jwt_identity()
 
+    try:
+        parse_jam(jam)
+    except ValueError:
+        return jsonify({"success": False, "message": "Format jam tidak valid (HH:mm)"}), 400
+
     try:
         result = db.riwayat_air.update_one(
-            {"user_id": ObjectId(user_id), "tanggal": tanggal},
-            {"$pull": {"riwayatJamMinum": jam}}
+            {"user_id": ObjectId(user_id), "tanggal": tanggal, **filter_ada_jam(jam)},
+            update_unset(jam),
+            session=session
         )
 
         if result.modified_count == 0:
@@ -103,5 +134,55 @@ def hapus_jam_tertentu(tanggal, jam):
             "success": True,
             "message": f"Jam {jam} berhasil dihapus dari tanggal {tanggal}"
         }), 200
+    except PyMongoError:
+        raise
     except Exception as e:
         return jsonify({"success": False, "message": f"Gagal hapus jam: {str(e)}"}), 400
+
+
+@air_bp.route("/air/statistik", methods=["GET"])
+@jwt_required()
+def statistik_air():
+    db = get_db()
+    session = get_session()
+    user_id = get_jwt_identity()
+    dari = request.args.get("dari")
+    sampai = request.args.get("sampai")
+
+    if not dari or not sampai:
+        return jsonify({"success": False, "message": "Parameter dari dan sampai harus diisi"}), 400
+
+    try:
+        selisih = (datetime.strptime(sampai, "%Y-%m-%d") - datetime.strptime(dari, "%Y-%m-%d")).days
+    except ValueError:
+        return jsonify({"success": False, "message": "Format tanggal tidak valid (YYYY-MM-DD)"}), 400
+    if selisih < 0 or selisih >= MAKS_HARI_STATISTIK:
+        return jsonify({
+            "success": False,
+            "message": f"Rentang tanggal harus 1-{MAKS_HARI_STATISTIK} hari"
+        }), 400
+
+    try:
+        per_hari = list(db.riwayat_air.aggregate(
+            pipeline_statistik(ObjectId(user_id), dari, sampai),
+            session=session
+        ))
+        # Dokumen yang belum dimigrasi masih punya string "HH:MM", hitung ulang lewat layer kompatibilitas
+        lama = {
+            doc["tanggal"]: doc for doc in db.riwayat_air.find(
+                {"user_id": ObjectId(user_id), "tanggal": {"$gte": dari, "$lte": sampai},
+                 FIELD_LAMA: {"$exists": True, "$ne": []}},
+                session=session
+            )
+        }
+        if lama:
+            per_hari = [h for h in per_hari if h["tanggal"] not in lama]
+            per_hari += [statistik_hari(tanggal, menit_minum(doc)) for tanggal, doc in lama.items()]
+            per_hari.sort(key=lambda h: h["tanggal"])
+
+        return jsonify({
+            "success": True,
+            "data": {"ringkasan": ringkas_statistik(per_hari), "perHari": per_hari}
+        }), 200
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Gagal ambil statistik: {str(e)}"}), 400
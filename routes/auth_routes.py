@@ -6,21 +6,28 @@ from flask_jwt_extended import (
     get_jwt_identity,
 )
 import re
+import uuid
 import requests
 import random
 from utils.email_utils import send_otp_email
-from datetime import datetime, timedelta
+from utils.mongo_routing import get_read_preference, get_session
+from utils.cooperative import hash_password, check_password
+from utils.admin import admin_required
+from models.user_model import login_history_publik
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 auth_bp = Blueprint("auth", __name__)
 
 user_model = None
 bcrypt = None
+login_buffer = None
 
-def init_auth_routes(model, bcrypt_instance):
-    global user_model, bcrypt
+def init_auth_routes(model, bcrypt_instance, login_buffer_instance):
+    global user_model, bcrypt, login_buffer
     user_model = model
     bcrypt = bcrypt_instance
+    login_buffer = login_buffer_instance
 
 
 def is_strong_password(password):
@@ -55,19 +62,21 @@ def register():
     if not is_strong:
         return jsonify({"success": False, "message": message}), 400
 
-    if user_model.find_by_email(email):
-        return jsonify({"success": False, "message": "Email sudah digunakan"}), 400
+    hashed = hash_password(bcrypt, password)
+    otp = str(random.randint(100000, 999999))
 
-    hashed = bcrypt.generate_password_hash(password).decode("utf-8")
+    # Index unik email yang menolak duplikat, tanpa find terpisah
+    try:
+        user_model.insert_user(email, username, hashed, otp, "verifikasi")
+    except DuplicateKeyError:
+        return jsonify({"success": False, "message": "Email sudah digunakan"}), 400
 
-    otp = str(random.randint(100000, 999999))
     print(f"✅ Kirim OTP ke {email}: {otp}")
     email_sent = send_otp_email(email, otp, "verifikasi")
     if not email_sent:
+        user_model.delete_by_email(email)
         return jsonify({"success": False, "message": "Gagal mengirim OTP ke email"}), 500
 
-    user_model.insert_user(email, username, hashed, otp, "verifikasi")
-
     return jsonify({
         "success": True,
         "message": "Registrasi berhasil. OTP telah dikirim ke email.",
@@ -90,7 +99,7 @@ def login():
     if user_password is None or user_password.strip() == "":
         return jsonify({"success": False, "message": "Akun ini login menggunakan Google. Silakan buat password dulu di profil."}), 400
 
-    if not bcrypt.check_password_hash(user_password, password):
+    if not check_password(bcrypt, user_password, password):
         return jsonify({"success": False, "message": "Password tidak sesuai"}), 401
 
     if not user.get("is_verified", False):
@@ -128,7 +137,6 @@ def log_login():
     try:
         user_id = get_jwt_identity()
         data = request.get_json()
-        print(f"🟡 Log Login - user_id: {user_id}, data: {data}")
 
         timestamp = data.get("timestamp")
         device = data.get("device")
@@ -137,16 +145,20 @@ def log_login():
             print("❌ Log login gagal: data kosong")
             return jsonify({"success": False, "message": "Data login tidak lengkap"}), 400
 
-        print("✅ Cek user di Mongo:", user_model.find_by_id(ObjectId(user_id)))
-        result = user_model.log_login_activity(user_id, timestamp, device)
+        # Ditulis belakangan oleh login buffer (bulk), tidak menunggu Mongo di sini
+        accepted = login_buffer.put({
+            "event_id": uuid.uuid4().hex,  # supaya flush ulang tidak bikin entri dobel
+            "user_id": ObjectId(user_id),
+            "timestamp": timestamp,
+            "device": device
+        })
 
-        if result.modified_count > 0:
-            print("✅ Log login berhasil disimpan")
-            print("📌 Modified Count:", result.modified_count)
+        if accepted:
+            # Tetap 200 + pesan lama: versi app yang sudah beredar mengecek status 200
             return jsonify({"success": True, "message": "Riwayat login tersimpan"}), 200
         else:
-            print("❌ Gagal update MongoDB login_history")
-            return jsonify({"success": False, "message": "Gagal menyimpan login"}), 500
+            print("❌ Login buffer penuh, event dibuang")
+            return jsonify({"success": False, "message": "Server sedang sibuk, coba lagi nanti"}), 503
 
     except Exception as e:
         import traceback
@@ -154,18 +166,25 @@ def log_login():
         traceback.print_exc()
         return jsonify({"success": False, "message": str(e)}), 500
 
+
+@auth_bp.route("/log-login/metrics", methods=["GET"])
+@jwt_required()
+@admin_required
+def log_login_metrics():
+    return jsonify({"success": True, "data": login_buffer.metrics()}), 200
+
 @auth_bp.route("/login-history", methods=["GET"])
 @jwt_required()
 def get_login_history():
     try:
         user_id = get_jwt_identity()
-        user = user_model.find_by_id(user_id)
+        user = user_model.find_login_history(user_id, get_read_preference(), get_session())
         if not user:
             return jsonify({"success": False, "message": "User tidak ditemukan"}), 404
 
         login_history = user.get("login_history", [])
         # Urutkan berdasarkan timestamp terbaru
-        sorted_history = sorted(login_history, key=lambda x: x["timestamp"], reverse=True)
+        sorted_history = sorted(login_history_publik(login_history), key=lambda x: x["timestamp"], reverse=True)
 
         return jsonify({"success": True, "data": sorted_history}), 200
 
@@ -185,11 +204,10 @@ def verify_otp():
     if not email or not otp_input:
         return jsonify({"success": False, "message": "Email dan OTP wajib diisi"}), 400
 
-    if not user_model.verify_otp(email, otp_input, "verifikasi"):
+    user = user_model.verify_otp_and_mark_verified(email, otp_input, "verifikasi")
+    if not user:
         return jsonify({"success": False, "message": "OTP tidak valid atau kadaluarsa"}), 400
 
-    user_model.set_verified(email)
-    user = user_model.find_by_email(email)
     user_id = str(user["_id"])
 
     # 🔥 Auto-login setelah OTP valid
@@ -228,11 +246,11 @@ def google_login():
 
     email = info["email"]
     username = info.get("name", "Pengguna Google")
-    user = user_model.find_by_email(email)
-
-    if not user:
-        # Buat user baru belum verifikasi
-        user_model.insert_user(email, username, None)
+    try:
+        # Ambil user atau buat baru (belum verifikasi) dalam satu round trip
+        user = user_model.upsert_google_user(email, username)
+    except DuplicateKeyError:
+        # Upsert bersamaan untuk email yang sama, dokumen sudah dibuat request lain
         user = user_model.find_by_email(email)
 
     if not user.get("is_verified", False):
@@ -278,12 +296,9 @@ def refresh():
 def update_profile():
     user_id = get_jwt_identity()
     data = request.json
-    user = user_model.find_by_id(user_id)
-
-    if not user:
-        return jsonify({"success": False, "message": "User tidak ditemukan"}), 404
 
     updates = {}
+    current_hash = None
 
     #  Update username/email
     if "username" in data:
@@ -298,20 +313,29 @@ def update_profile():
         new_pw = pw_data.get("new")
         if not current_pw or not new_pw:
             return jsonify({"success": False, "message": "Harap masukkan password saat ini dan password baru"}), 400
-        if not bcrypt.check_password_hash(user.get("password", ""), current_pw):
+        user = user_model.find_by_id(user_id, {"password": 1})
+        if not user:
+            return jsonify({"success": False, "message": "User tidak ditemukan"}), 404
+        current_hash = user.get("password", "")
+        if not check_password(bcrypt, current_hash, current_pw):
             return jsonify({"success": False, "message": "Password saat ini salah"}), 400
         is_strong, message = is_strong_password(new_pw)
         if not is_strong:
             return jsonify({"success": False, "message": message}), 400
-        updates["password"] = bcrypt.generate_password_hash(new_pw).decode("utf-8")
+        updates["password"] = hash_password(bcrypt, new_pw)
 
     if not updates:
         return jsonify({"success": False, "message": "Tidak ada data yang diubah"}), 400
 
-    result = user_model.collection.update_one(
-        {"_id": user["_id"]},
-        {"$set": updates}
-    )
+    try:
+        result = user_model.update_profile(user_id, updates, current_hash)
+    except DuplicateKeyError:
+        return jsonify({"success": False, "message": "Email sudah digunakan"}), 400
+
+    if result.matched_count == 0:
+        if current_hash is not None:
+            return jsonify({"success": False, "message": "Password baru saja berubah, silakan coba lagi"}), 409
+        return jsonify({"success": False, "message": "User tidak ditemukan"}), 404
 
     if result.modified_count == 0:
         return jsonify({"success": False, "message": "Data tidak diubah"}), 400
@@ -325,32 +349,21 @@ def resend_otp():
     email = data.get("email", "").strip()
     purpose = data.get("purpose", "verifikasi").strip()
 
-    user = user_model.find_by_email(email)
-    if not user:
-        return jsonify({"success": False, "message": "Email tidak terdaftar."}), 404
-
-    if purpose == "verifikasi" and user.get("is_verified", False):
-        return jsonify({"success": False, "message": "Email sudah terverifikasi."}), 400
-
-    if user.get("otp_last_sent") and datetime.utcnow() - user["otp_last_sent"] < timedelta(minutes=5):
-        if user.get("otp_request_count", 0) >= 3:
-            return jsonify({"success": False, "message": "Terlalu banyak permintaan OTP. Coba lagi nanti."}), 429
-        new_count = user.get("otp_request_count", 0) + 1
-    else:
-        new_count = 1
-
     otp = str(random.randint(100000, 999999))
-    updated = user_model.set_otp_for_reset(email, otp, purpose)
+    # Cek terdaftar, status verifikasi & rate limit sekaligus set OTP, satu round trip
+    updated = user_model.request_otp(email, otp, purpose, only_unverified=(purpose == "verifikasi"))
 
-    if updated:
-        user_model.collection.update_one({"email": email}, {"$set": {
-            "otp_last_sent": datetime.utcnow(),
-            "otp_request_count": new_count
-        }})
-        send_otp_email(email, otp, purpose)
-        return jsonify({"success": True, "message": f"OTP {purpose} baru telah dikirim ke email."}), 200
-    else:
-        return jsonify({"success": False, "message": "Gagal mengirim OTP baru."}), 500
+    if not updated:
+        # Jalur gagal saja: cari tahu alasannya untuk pesan error
+        user = user_model.find_by_email(email)
+        if not user:
+            return jsonify({"success": False, "message": "Email tidak terdaftar."}), 404
+        if purpose == "verifikasi" and user.get("is_verified", False):
+            return jsonify({"success": False, "message": "Email sudah terverifikasi."}), 400
+        return jsonify({"success": False, "message": "Terlalu banyak permintaan OTP. Coba lagi nanti."}), 429
+
+    send_otp_email(email, otp, purpose)
+    return jsonify({"success": True, "message": f"OTP {purpose} baru telah dikirim ke email."}), 200
 
 
 @auth_bp.route("/verify-reset-otp", methods=["POST"])
@@ -373,29 +386,16 @@ def forgot_password():
     data = request.json
     email = data.get("email", "").strip()
 
-    user = user_model.find_by_email(email)
-    if not user:
-        return jsonify({"success": False, "message": "Email tidak terdaftar"}), 404
+    otp = str(random.randint(100000, 999999))
+    updated = user_model.request_otp(email, otp, "reset")
 
-    if user.get("otp_last_sent") and datetime.utcnow() - user["otp_last_sent"] < timedelta(minutes=5):
-        if user.get("otp_request_count", 0) >= 3:
-            return jsonify({"success": False, "message": "Terlalu banyak permintaan OTP. Coba lagi nanti."}), 429
-        new_count = user.get("otp_request_count", 0) + 1
-    else:
-        new_count = 1
+    if not updated:
+        if not user_model.find_by_email(email):
+            return jsonify({"success": False, "message": "Email tidak terdaftar"}), 404
+        return jsonify({"success": False, "message": "Terlalu banyak permintaan OTP. Coba lagi nanti."}), 429
 
-    otp = str(random.randint(100000, 999999))
-    updated = user_model.set_otp_for_reset(email, otp, "reset")
-
-    if updated:
-        user_model.collection.update_one({"email": email}, {"$set": {
-            "otp_last_sent": datetime.utcnow(),
-            "otp_request_count": new_count
-        }})
-        send_otp_email(email, otp, "reset")
-        return jsonify({"success": True, "message": "OTP untuk reset password telah dikirim ke email."}), 200
-    else:
-        return jsonify({"success": False, "message": "Gagal mengatur OTP."}), 500
+    send_otp_email(email, otp, "reset")
+    return jsonify({"success": True, "message": "OTP untuk reset password telah dikirim ke email."}), 200
 
 @auth_bp.route("/reset-password", methods=["POST"])
 def reset_password():
@@ -411,14 +411,11 @@ def reset_password():
     if not email or not otp_input or not new_password:
         return jsonify({"success": False, "message": "Email, OTP, dan password baru wajib diisi."}), 400
 
-    if not user_model.verify_otp(email, otp_input, "reset"):
+    # Cek OTP dan ganti password secara atomik, OTP tidak bisa dipakai dua kali
+    if not user_model.reset_password_with_otp(email, otp_input, new_password):
         return jsonify({"success": False, "message": "OTP salah atau kadaluarsa."}), 400
 
-    updated = user_model.reset_password(email, new_password)
-    if updated:
-        return jsonify({"success": True, "message": "Password berhasil direset."}), 200
-    else:
-        return jsonify({"success": False, "message": "Gagal reset password."}), 500
+    return jsonify({"success": True, "message": "Password berhasil direset."}), 200
 
 
 @auth_bp.route("/user/info", methods=["GET"])
@@ -0,0 +1,182 @@
+from urllib.parse import urlsplit
+from flask import Blueprint, request, jsonify, current_app, g, make_response
+from flask_jwt_extended import jwt_required
+from werkzeug.exceptions import HTTPException
+from utils.idempotency import IDEMPOTENCY_HEADER
+from utils.mongo_routing import (
+    BATCH_SUBREQUEST_KEY,
+    get_session,
+    start_child_session,
+    merge_child_session,
+)
+from utils.thread_pool import get_executor
+
+batch_bp = Blueprint("batch", __name__)
+
+# Hanya blueprint ini yang boleh dipanggil lewat batch. Semua view-nya harus memakai
+# @jwt_required() tepat di bawah @route (dicek saat register, lihat _register_batch_views).
+BATCH_BLUEPRINTS = {"gula", "air"}
+METHODS = {"GET", "POST", "PUT", "DELETE"}
+
+# Semua wrapper buatan jwt_required() berbagi code object yang sama
+_JWT_WRAPPER_CODE = jwt_required()(lambda: None).__code__
+
+
+@batch_bp.record_once
+def _register_batch_views(state):
+    # view.__wrapped__ hanya aman kalau lapisan terluar memang wrapper JWT. Kalau urutan
+    # decorator berubah (mis. @idempotent di atas @jwt_required), batch diam-diam akan
+    # melewati decorator itu, jadi lebih baik gagal saat start.
+    app = state.app
+    views = {}
+    for endpoint, view in app.view_functions.items():
+        if endpoint.split(".")[0] not in BATCH_BLUEPRINTS:
+            continue
+        if getattr(view, "__code__", None) is not _JWT_WRAPPER_CODE or not hasattr(view, "__wrapped__"):
+            raise RuntimeError(
+                f"View {endpoint} tidak bisa dipanggil lewat batch: @jwt_required() harus tepat di bawah @route"
+            )
+        views[endpoint] = view.__wrapped__
+    if not views:
+        raise RuntimeError("batch_bp harus di-register setelah blueprint " + ", ".join(sorted(BATCH_BLUEPRINTS)))
+    app.extensions["batch_views"] = views
+
+
+def _error(status, message):
+    return {"status": status, "body": {"success": False, "message": message}}
+
+
+def _parse(sub):
+    if not isinstance(sub, dict):
+        return None, _error(400, "Sub-request harus berupa object")
+
+    method = str(sub.get("method", "GET")).upper()
+    path = sub.get("path")
+    if method not in METHODS:
+        return None, _error(405, f"Method {method} tidak didukung")
+    if not isinstance(path, str) or not path.startswith("/api/"):
+        return None, _error(400, "Path harus diawali /api/")
+
+    parts = urlsplit(path)
+    adapter = current_app.url_map.bind("localhost")
+    try:
+        endpoint, view_args = adapter.match(parts.path, method=method)
+    except HTTPException as e:
+        return None, _error(e.code, e.description)
+
+    if endpoint.split(".")[0] not in BATCH_BLUEPRINTS:
+        return None, _error(400, f"Endpoint {parts.path} tidak bisa dipanggil lewat batch")
+
+    return {
+        "method": method,
+        "path": parts.path,
+        "query": parts.query,
+        "body": sub.get("body"),
+        "idempotency_key": sub.get("idempotencyKey"),
+        "endpoint": endpoint,
+        "view_args": view_args,
+    }, None
+
+
+def _dispatch(app, call, jwt_state, session):
+    headers = {}
+    if call["idempotency_key"]:
+        headers[IDEMPOTENCY_HEADER] = call["idempotency_key"]
+
+    ctx = app.test_request_context(
+        call["path"],
+        method=call["method"],
+        query_string=call["query"],
+        json=call["body"],
+        headers=headers,
+        environ_base={BATCH_SUBREQUEST_KEY: True},
+    )
+    with ctx:
+        # JWT sudah diverifikasi sekali oleh /api/batch, cukup salin hasilnya ke g
+        for name, value in jwt_state.items():
+            setattr(g, name, value)
+        g.mongo_session = session
+
+        view = app.extensions["batch_views"][call["endpoint"]]
+        try:
+            response = make_response(view(**call["view_args"]))
+        except HTTPException as e:
+            response = e.get_response()
+        except Exception as e:
+            return _error(500, f"Gagal memproses sub-request: {str(e)}")
+
+        body = response.get_json(silent=True)
+        if body is None:
+            body = response.get_data(as_text=True)
+        return {"status": response.status_code, "body": body}
+
+
+def _run_parallel(app, calls, jwt_state):
+    executor = get_executor(app.config["THREAD_POOL_WORKERS"])
+    sessions = [start_child_session() for _ in calls]
+    futures = [
+        executor.submit(_dispatch, app, call, jwt_state, session)
+        for call, session in zip(calls, sessions)
+    ]
+    try:
+        return [future.result() for future in futures]
+    finally:
+        for future, session in zip(futures, sessions):
+            future.exception()
+            merge_child_session(session)
+
+
+@batch_bp.route("/batch", methods=["POST"])
+@jwt_required()
+def batch():
+    max_body = current_app.config["BATCH_MAX_BODY_BYTES"]
+    if request.content_length is None:
+        return jsonify({"success": False, "message": "Header Content-Length wajib diisi"}), 411
+    if request.content_length > max_body:
+        return jsonify({"success": False, "message": f"Ukuran batch maksimal {max_body} byte"}), 413
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "Body batch harus berupa object JSON"}), 400
+    subs = data.get("requests")
+    parallel = bool(data.get("parallel", False))
+
+    if not isinstance(subs, list) or not subs:
+        return jsonify({"success": False, "message": "Field requests harus berupa list dan tidak boleh kosong"}), 400
+
+    max_requests = current_app.config["BATCH_MAX_REQUESTS"]
+    if len(subs) > max_requests:
+        return jsonify({"success": False, "message": f"Maksimal {max_requests} request per batch"}), 400
+
+    app = current_app._get_current_object()
+    jwt_state = {name: value for name, value in vars(g).items() if name.startswith("_jwt_extended_")}
+    session = get_session()
+
+    results = [None] * len(subs)
+    pending_reads = []
+
+    def flush_reads():
+        if not pending_reads:
+            return
+        if len(pending_reads) == 1:
+            i, call = pending_reads[0]
+            results[i] = _dispatch(app, call, jwt_state, session)
+        else:
+            for (i, _), result in zip(pending_reads, _run_parallel(app, [c for _, c in pending_reads], jwt_state)):
+                results[i] = result
+        pending_reads.clear()
+
+    for i, sub in enumerate(subs):
+        call, error = _parse(sub)
+        if error:
+            results[i] = error
+            continue
+        if parallel and call["method"] == "GET":
+            # GET berturut-turut dijalankan paralel, write jadi pembatas supaya urutan tetap
+            pending_reads.append((i, call))
+            continue
+        flush_reads()
+        results[i] = _dispatch(app, call, jwt_state, session)
+    flush_reads()
+
+    return jsonify({"success": True, "data": results}), 200
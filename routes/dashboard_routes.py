@@ -0,0 +1,138 @@
+import time
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from bson.objectid import ObjectId
+from pymongo.errors import PyMongoError
+from datetime import datetime, timedelta
+from models.user_model import login_history_publik
+from utils.mongo_routing import get_db, start_child_session, merge_child_session
+from utils.thread_pool import get_executor
+from utils.gula_arsip import ambil_arsip, gabung_dengan_arsip, perlu_baca_arsip
+from utils.air_bitmap import jam_minum, FIELD_BITMAP, FIELD_LAMA
+
+dashboard_bp = Blueprint("dashboard", __name__)
+
+JUMLAH_LOGIN_TERAKHIR = 5
+
+
+def _ambil_user(db, user_oid, session):
+    user = db.users.find_one(
+        {"_id": user_oid},
+        # Cukup flag ada/tidaknya password, hash bcrypt tidak perlu ikut dikirim dari server
+        {"username": 1, "email": 1, "punyaPassword": {"$gt": ["$password", ""]}},
+        session=session
+    )
+    if not user:
+        return None
+    reminder = ""
+    if not user.get("punyaPassword"):
+        reminder = "Akun Anda belum memiliki password. Silakan buat password untuk login manual."
+    return {"username": user.get("username"), "email": user.get("email"), "reminder": reminder}
+
+
+def _ambil_gula(db, user_oid, tanggal, baca_arsip, session):
+    awal = datetime.strptime(tanggal, "%Y-%m-%d")
+    akhir = awal + timedelta(days=1)
+    data = list(db.riwayat_gula.find(
+        {"user_id": user_oid, "waktuInput": {"$gte": awal.isoformat(), "$lt": akhir.isoformat()}},
+        {"namaMakanan": 1, "totalGula": 1, "sendokTeh": 1, "sendokMakan": 1, "waktuInput": 1},
+        session=session
+    ))
+    # Tanggal lama bisa saja sudah dipindah ke bucket bulanan (live dibaca dulu, baru bucket)
+    if baca_arsip:
+        data = gabung_dengan_arsip(data, ambil_arsip(db, user_oid, session, awal, akhir))
+    for item in data:
+        item.pop("user_id", None)
+        item["_id"] = str(item["_id"])
+    return data
+
+
+def _ambil_air(db, user_oid, tanggal, session):
+    data = db.riwayat_air.find_one(
+        {"user_id": user_oid, "tanggal": tanggal},
+        {"_id": 0, FIELD_BITMAP: 1, FIELD_LAMA: 1},
+        session=session
+    )
+    return {"tanggal": tanggal, "riwayatJamMinum": jam_minum(data)}
+
+
+def _ambil_login_history(db, user_oid, session):
+    user = db.users.find_one(
+        {"_id": user_oid},
+        {"_id": 0, "login_history": {"$slice": -JUMLAH_LOGIN_TERAKHIR * 2}},
+        session=session
+    )
+    history = user.get("login_history", []) if user else []
+    history = login_history_publik(history)
+    return sorted(history, key=lambda x: x["timestamp"], reverse=True)[:JUMLAH_LOGIN_TERAKHIR]
+
+
+def _run(fn, db, session, *args):
+    mulai = time.perf_counter()
+    return fn(db, *args, session), (time.perf_counter() - mulai) * 1000
+
+
+@dashboard_bp.route("/dashboard", methods=["GET"])
+@jwt_required()
+def dashboard():
+    db = get_db()
+    user_id = get_jwt_identity()
+    tanggal = request.args.get("date", datetime.utcnow().strftime("%Y-%m-%d"))
+
+    try:
+        baca_arsip = perlu_baca_arsip(
+            datetime.strptime(tanggal, "%Y-%m-%d"), current_app.config["GULA_ARSIP_BULAN"]
+        )
+    except ValueError:
+        return jsonify({"success": False, "message": "Format tanggal tidak valid (YYYY-MM-DD)"}), 400
+
+    user_oid = ObjectId(user_id)
+    executor = get_executor(current_app.config["THREAD_POOL_WORKERS"])
+    queries = {
+        "user": (_ambil_user, user_oid),
+        "gula": (_ambil_gula, user_oid, tanggal, baca_arsip),
+        "air": (_ambil_air, user_oid, tanggal),
+        "login": (_ambil_login_history, user_oid),
+    }
+
+    mulai = time.perf_counter()
+    sessions = {name: start_child_session() for name in queries}
+    futures = {
+        name: executor.submit(_run, fn, db, sessions[name], *args)
+        for name, (fn, *args) in queries.items()
+    }
+
+    hasil, durasi = {}, {}
+    try:
+        for name, future in futures.items():
+            hasil[name], durasi[name] = future.result()
+    except PyMongoError:
+        raise  # ditangani handler 503 di app
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Gagal mengambil dashboard: {str(e)}"}), 400
+    finally:
+        for name, session in sessions.items():
+            futures[name].exception()  # tunggu semua selesai sebelum session ditutup
+            merge_child_session(session)
+    durasi["total"] = (time.perf_counter() - mulai) * 1000
+
+    if hasil["user"] is None:
+        return jsonify({"success": False, "message": "User tidak ditemukan"}), 404
+
+    gula = hasil["gula"]
+    response = jsonify({"success": True, "data": {
+        "user": hasil["user"],
+        "gula": {
+            "tanggal": tanggal,
+            "totalGula": sum(float(item.get("totalGula", 0)) for item in gula),
+            "sendokTeh": sum(float(item.get("sendokTeh", 0)) for item in gula),
+            "riwayat": gula
+        },
+        "air": hasil["air"],
+        "loginHistory": hasil["login"]
+    }})
+    response.headers["Server-Timing"] = ", ".join(
+        f"{name};dur={ms:.1f}" for name, ms in durasi.items()
+    )
+    return response, 200
+
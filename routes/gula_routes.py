@@ -1,11 +1,32 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson.objectid import ObjectId
+from pymongo.errors import PyMongoError
+from utils.mongo_routing import get_db, get_session
+from utils.idempotency import idempotent
 from bson.errors import InvalidId
+from utils.lru_cache import LRUCache
+from utils.gula_trends import (
+    pipeline_seri_harian, susun_seri, ukuran_seri, hitung_tren, BATAS_GULA_HARIAN, MAKS_HARI_RIWAYAT
+)
+from utils.gula_arsip import ambil_arsip, gabung_dengan_arsip, perlu_baca_arsip, update_arsip, hapus_arsip
 from datetime import datetime, timedelta
 
 gula_bp = Blueprint("gula", __name__)
 
+# Seri harian per (user, versi data), otomatis basi saat versi naik. Parameter tren
+# (batas, window, ...) dihitung ulang per request dari seri ini, jadi tidak ikut jadi key.
+tren_cache = LRUCache(maxsize=2048, maxbytes=32 * 1024 * 1024, sizeof=ukuran_seri)
+
+
+def naikkan_versi_gula(db, user_oid, session=None):
+    db.gula_versi.update_one({"_id": user_oid}, {"$inc": {"v": 1}}, upsert=True, session=session)
+
+
+def ambil_versi_gula(db, user_oid, session=None):
+    doc = db.gula_versi.find_one({"_id": user_oid}, session=session)
+    return doc["v"] if doc else 0
+
 def validate_gula_payload(data):
     try:
         gula = int(data.get("gulaPerBungkus", 0))
@@ -25,8 +46,10 @@ def validate_gula_payload(data):
 
 @gula_bp.route("/gula", methods=["POST"])
 @jwt_required()
+@idempotent
 def tambah_gula():
-    db = request.mongo.db
+    db = get_db()
+    session = get_session()
     user_id = get_jwt_identity()
     data = request.json
 
@@ -46,10 +69,13 @@ def tambah_gula():
             "sendokMakan": data["sendokMakan"],  # 🔥 Tambahan field sendok makan
             "waktuInput": data.get("waktuInput", datetime.utcnow().isoformat())
         }
-        result = db.riwayat_gula.insert_one(item)
+        result = db.riwayat_gula.insert_one(item, session=session)
+        naikkan_versi_gula(db, item["user_id"], session)
         item["_id"] = str(result.inserted_id)
         item["user_id"] = str(item["user_id"])
         return jsonify({"success": True, "message": "Data berhasil ditambahkan", "data": item}), 201
+    except PyMongoError:
+        raise
     except Exception as e:
         return jsonify({"success": False, "message": f"Gagal menambahkan data: {str(e)}"}), 400
 
@@ -57,13 +83,15 @@ def tambah_gula():
 @gula_bp.route("/gula", methods=["GET"])
 @jwt_required()
 def ambil_gula():
-    db = request.mongo.db
+    db = get_db()
+    session = get_session()
     user_id = get_jwt_identity()
     date_str = request.args.get("date")
     keyword = request.args.get("search")
 
     try:
         query = {"user_id": ObjectId(user_id)}
+        tanggal = next_day = None
 
         if date_str:
             tanggal = datetime.strptime(date_str, "%Y-%m-%d")
@@ -76,7 +104,12 @@ def ambil_gula():
         if keyword:
             query["namaMakanan"] = {"$regex": keyword, "$options": "i"}
 
-        data = list(db.riwayat_gula.find(query))
+        # Entri lama ada di bucket bulanan. Live dibaca dulu, baru bucket (lihat gabung_dengan_arsip)
+        data = list(db.riwayat_gula.find(query, session=session))
+        # Tanggal yang belum lewat cutoff kompaksi (mis. hari ini) tidak perlu round trip ke bucket
+        if perlu_baca_arsip(tanggal, current_app.config["GULA_ARSIP_BULAN"]):
+            arsip = ambil_arsip(db, query["user_id"], session, tanggal, next_day, keyword)
+            data = gabung_dengan_arsip(data, arsip)
         for item in data:
             item["_id"] = str(item["_id"])
             item["user_id"] = str(item["user_id"])
@@ -88,8 +121,10 @@ def ambil_gula():
 
 @gula_bp.route("/gula/<id>", methods=["PUT"])
 @jwt_required()
+@idempotent
 def update_gula(id):
-    db = request.mongo.db
+    db = get_db()
+    session = get_session()
     user_id = get_jwt_identity()
     data = request.json
 
@@ -114,19 +149,24 @@ def update_gula(id):
             "sendokMakan": data["sendokMakan"],  # 🔥 Update field sendok makan
         }}
 
-        result = db.riwayat_gula.update_one(query, update)
-        if result.matched_count == 0:
+        result = db.riwayat_gula.update_one(query, update, session=session)
+        if result.matched_count == 0 and not update_arsip(db, query["user_id"], obj_id, update["$set"], session):
             return jsonify({"success": False, "message": "Data tidak ditemukan atau tidak punya akses"}), 404
 
+        naikkan_versi_gula(db, ObjectId(user_id), session)
         return jsonify({"success": True, "message": "Data berhasil diperbarui"}), 200
+    except PyMongoError:
+        raise
     except Exception as e:
         return jsonify({"success": False, "message": f"Gagal update data: {str(e)}"}), 400
 
 
 @gula_bp.route("/gula/<id>", methods=["DELETE"])
 @jwt_required()
+@idempotent
 def hapus_gula(id):
-    db = request.mongo.db
+    db = get_db()
+    session = get_session()
     user_id = get_jwt_identity()
 
     try:
@@ -135,10 +175,52 @@ def hapus_gula(id):
         except InvalidId:
             return jsonify({"success": False, "message": "ID tidak valid"}), 400
 
-        result = db.riwayat_gula.delete_one({"_id": obj_id, "user_id": ObjectId(user_id)})
-        if result.deleted_count == 0:
+        result = db.riwayat_gula.delete_one({"_id": obj_id, "user_id": ObjectId(user_id)}, session=session)
+        if result.deleted_count == 0 and not hapus_arsip(db, ObjectId(user_id), obj_id, session):
             return jsonify({"success": False, "message": "Data tidak ditemukan atau tidak punya akses"}), 404
 
+        naikkan_versi_gula(db, ObjectId(user_id), session)
         return jsonify({"success": True, "message": "Data berhasil dihapus"}), 200
+    except PyMongoError:
+        raise
     except Exception as e:
         return jsonify({"success": False, "message": f"Gagal hapus data: {str(e)}"}), 400
+
+
+@gula_bp.route("/gula/trends", methods=["GET"])
+@jwt_required()
+def tren_gula():
+    db = get_db()
+    session = get_session()
+    user_id = get_jwt_identity()
+
+    try:
+        batas = float(request.args.get("batas", BATAS_GULA_HARIAN))
+        window = int(request.args.get("window", 7))
+        hari = int(request.args.get("hari", 90))
+        minggu = int(request.args.get("minggu", 12))
+    except ValueError:
+        return jsonify({"success": False, "message": "Parameter tidak valid (harus angka)"}), 400
+
+    if batas <= 0 or not 1 <= window <= 90 or not 1 <= hari <= 3660 or not 1 <= minggu <= 520:
+        return jsonify({"success": False, "message": "Parameter di luar batas yang diizinkan"}), 400
+
+    try:
+        user_oid = ObjectId(user_id)
+        sekarang = datetime.utcnow()
+        hari_ini = sekarang.strftime("%Y-%m-%d")
+        dari = (sekarang - timedelta(days=MAKS_HARI_RIWAYAT)).strftime("%Y-%m-%d")
+        versi = ambil_versi_gula(db, user_oid, session)
+
+        key = (user_id, versi, hari_ini)
+        seri = tren_cache.get(key)
+        if seri is None:
+            seri = susun_seri(list(db.riwayat_gula.aggregate(
+                pipeline_seri_harian(user_oid, dari, hari_ini), session=session
+            )))
+            tren_cache.set(key, seri)
+        hasil = hitung_tren(seri, batas, window, hari, minggu, sampai=hari_ini)
+
+        return jsonify({"success": True, "message": "Tren ditemukan", "data": hasil}), 200
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Gagal menghitung tren: {str(e)}"}), 400
@@ -0,0 +1,150 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from bson.errors import InvalidId
+from pymongo.errors import DuplicateKeyError
+from utils.admin import admin_required
+
+katalog_bp = Blueprint("katalog", __name__)
+
+katalog_model = None
+katalog_index = None
+
+def init_katalog_routes(model, index):
+    global katalog_model, katalog_index
+    katalog_model = model
+    katalog_index = index
+
+
+@katalog_bp.route("/katalog/autocomplete", methods=["GET"])
+@jwt_required()
+def autocomplete_katalog():
+    q = request.args.get("q", "").strip()
+    try:
+        limit = max(1, min(int(request.args.get("limit", 10)), 50))
+    except ValueError:
+        return jsonify({"success": False, "message": "Limit harus angka"}), 400
+
+    if not q:
+        return jsonify({"success": True, "data": []}), 200
+
+    return jsonify({"success": True, "data": katalog_index.search(q, limit)}), 200
+
+
+@katalog_bp.route("/katalog/<id>", methods=["GET"])
+@jwt_required()
+def detail_katalog(id):
+    try:
+        item = katalog_model.find_by_id(id)
+    except InvalidId:
+        return jsonify({"success": False, "message": "ID tidak valid"}), 400
+
+    if not item:
+        return jsonify({"success": False, "message": "Data tidak ditemukan"}), 404
+
+    return jsonify({"success": True, "data": {
+        "_id": str(item["_id"]),
+        "nama": item["nama"],
+        "gulaPerSaji": item.get("gulaPerSaji"),
+        "isiPerSaji": item.get("isiPerSaji"),
+        "satuan": item.get("satuan", "g")
+    }}), 200
+
+
+def validate_angka_katalog(data, wajib_gula=True):
+    # Mengembalikan (gula, isi, pesan_error)
+    try:
+        gula = float(data["gulaPerSaji"]) if wajib_gula or data.get("gulaPerSaji") is not None else None
+        isi = float(data["isiPerSaji"]) if data.get("isiPerSaji") is not None else None
+    except (KeyError, TypeError, ValueError):
+        return None, None, "Input tidak valid (harus angka)"
+
+    if (gula is not None and gula < 0) or (isi is not None and isi <= 0):
+        return None, None, "Gula per saji tidak boleh negatif dan isi harus lebih dari 0"
+    return gula, isi, None
+
+
+# Katalog dipakai semua user, jadi hanya admin (ADMIN_EMAILS) yang boleh mengubah isinya
+@katalog_bp.route("/katalog", methods=["POST"])
+@jwt_required()
+@admin_required
+def tambah_katalog():
+    data = request.json
+    nama = data.get("nama", "").strip()
+
+    if not nama:
+        return jsonify({"success": False, "message": "Nama makanan wajib diisi"}), 400
+
+    gula, isi, error = validate_angka_katalog(data)
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+
+    try:
+        inserted_id = katalog_model.insert_item(nama, gula, isi, data.get("satuan", "g"))
+    except DuplicateKeyError:
+        return jsonify({"success": False, "message": "Makanan sudah ada di katalog"}), 400
+
+    # Langsung masukkan ke overlay worker ini supaya muncul di autocomplete berikutnya
+    katalog_index.refresh(force=True)
+
+    return jsonify({
+        "success": True,
+        "message": "Data berhasil ditambahkan ke katalog",
+        "data": {"_id": str(inserted_id), "nama": nama, "gulaPerSaji": gula, "isiPerSaji": isi}
+    }), 201
+
+
+@katalog_bp.route("/katalog/<id>", methods=["PUT"])
+@jwt_required()
+@admin_required
+def update_katalog(id):
+    data = request.json or {}
+    updates = {}
+
+    if "nama" in data:
+        nama = str(data.get("nama") or "").strip()
+        if not nama:
+            return jsonify({"success": False, "message": "Nama makanan tidak boleh kosong"}), 400
+        updates["nama"] = nama
+
+    gula, isi, error = validate_angka_katalog(data, wajib_gula=False)
+    if error:
+        return jsonify({"success": False, "message": error}), 400
+    if gula is not None:
+        updates["gulaPerSaji"] = gula
+    if "isiPerSaji" in data:
+        updates["isiPerSaji"] = isi
+    if data.get("satuan"):
+        updates["satuan"] = data["satuan"]
+
+    if not updates:
+        return jsonify({"success": False, "message": "Tidak ada data yang diubah"}), 400
+
+    try:
+        matched = katalog_model.update_item(id, updates)
+    except InvalidId:
+        return jsonify({"success": False, "message": "ID tidak valid"}), 400
+    except DuplicateKeyError:
+        return jsonify({"success": False, "message": "Makanan sudah ada di katalog"}), 400
+
+    if not matched:
+        return jsonify({"success": False, "message": "Data tidak ditemukan"}), 404
+
+    katalog_index.refresh(force=True)
+    return jsonify({"success": True, "message": "Data katalog berhasil diperbarui"}), 200
+
+
+@katalog_bp.route("/katalog/<id>", methods=["DELETE"])
+@jwt_required()
+@admin_required
+def hapus_katalog(id):
+    try:
+        deleted = katalog_model.delete_item(id)
+    except InvalidId:
+        return jsonify({"success": False, "message": "ID tidak valid"}), 400
+
+    if not deleted:
+        return jsonify({"success": False, "message": "Data tidak ditemukan"}), 404
+
+    # Soft delete: worker lain ikut menghapus dari index lewat refresh incremental
+    katalog_index.refresh(force=True)
+    return jsonify({"success": True, "message": "Data katalog berhasil dihapus"}), 200
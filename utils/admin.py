@@ -0,0 +1,26 @@
+from functools import wraps
+from bson.objectid import ObjectId
+from flask import jsonify, current_app
+from flask_jwt_extended import get_jwt_identity
+from utils.mongo_routing import get_db
+
+
+def is_admin(user_id):
+    # Admin ditentukan lewat ADMIN_EMAILS di config
+    admins = current_app.config.get("ADMIN_EMAILS") or set()
+    if not admins:
+        return False
+    user = get_db().users.find_one({"_id": ObjectId(user_id)}, {"email": 1})
+    return bool(user) and user.get("email", "").lower() in admins
+
+
+def admin_required(view):
+    """Dipasang di bawah @jwt_required(): tolak request dari user yang bukan admin."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin(get_jwt_identity()):
+            return jsonify({"success": False, "message": "Akses hanya untuk admin"}), 403
+        return view(*args, **kwargs)
+
+    return wrapper
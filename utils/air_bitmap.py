@@ -0,0 +1,227 @@
+"""Encoding bitmap menit-dalam-hari untuk riwayat_air.
+
+Satu hari = 1440 bit, disimpan per jam di `menitMinum`: {"07": NumberLong(bit menit 0..59), ...}.
+Hanya jam yang ada minumnya yang disimpan, dan tiap jam muat di satu Int64 sehingga
+bisa di-update atomik dengan $bit (operator $bit hanya jalan di int/long, tidak di BinData).
+
+Migrasi dokumen lama (riwayatJamMinum berisi "HH:MM"):
+
+    python -m utils.air_bitmap --uri mongodb://localhost:27017 --db scansek
+"""
+import argparse
+import os
+from datetime import datetime
+
+from bson.int64 import Int64
+from pymongo import UpdateOne
+
+FIELD_BITMAP = "menitMinum"
+FIELD_LAMA = "riwayatJamMinum"
+SEMUA_MENIT_JAM = (1 << 60) - 1
+
+
+def parse_jam(jam):
+    """'HH:MM' -> (jam, menit). ValueError kalau formatnya salah."""
+    waktu = datetime.strptime(jam, "%H:%M")
+    return waktu.hour, waktu.minute
+
+
+def format_menit(menit):
+    return f"{menit // 60:02d}:{menit % 60:02d}"
+
+
+def encode(daftar_jam):
+    """List 'HH:MM' -> dict bitmap per jam."""
+    bitmap = {}
+    for jam in daftar_jam:
+        h, m = parse_jam(jam)
+        key = f"{h:02d}"
+        bitmap[key] = bitmap.get(key, 0) | (1 << m)
+    return {key: Int64(bits) for key, bits in bitmap.items()}
+
+
+def decode(bitmap):
+    """Dict bitmap per jam -> list menit-dalam-hari yang terurut."""
+    menit = []
+    for key in sorted(bitmap or {}):
+        bits = int(bitmap[key])
+        base = int(key) * 60
+        while bits:
+            low = bits & -bits
+            menit.append(base + low.bit_length() - 1)
+            bits ^= low
+    return menit
+
+
+def menit_minum(doc):
+    """Layer kompatibilitas: menit dari bitmap + sisa array lama yang belum dimigrasi, terurut."""
+    if not doc:
+        return []
+    menit = set(decode(doc.get(FIELD_BITMAP)))
+    for jam in doc.get(FIELD_LAMA) or []:
+        try:
+            h, m = parse_jam(jam)
+        except ValueError:
+            continue
+        menit.add(h * 60 + m)
+    return sorted(menit)
+
+
+def jam_minum(doc):
+    return [format_menit(m) for m in menit_minum(doc)]
+
+
+def update_set(jam):
+    h, m = parse_jam(jam)
+    return {"$bit": {f"{FIELD_BITMAP}.{h:02d}": {"or": Int64(1 << m)}}}
+
+
+def update_unset(jam):
+    # $pull ikut dikirim supaya dokumen yang belum dimigrasi tetap bisa dihapus jam-nya
+    h, m = parse_jam(jam)
+    return {
+        "$bit": {f"{FIELD_BITMAP}.{h:02d}": {"and": Int64(SEMUA_MENIT_JAM ^ (1 << m))}},
+        "$pull": {FIELD_LAMA: jam},
+    }
+
+
+def filter_ada_jam(jam):
+    # Tanpa filter ini, $bit "and" di jam yang belum ada tetap bikin field 0 dan dihitung modified
+    h, m = parse_jam(jam)
+    return {"$or": [
+        {f"{FIELD_BITMAP}.{h:02d}": {"$bitsAllSet": 1 << m}},
+        {FIELD_LAMA: jam},
+    ]}
+
+
+def _ekspresi_menit():
+    # Decode bitmap di server: [{k: "07", v: bits}] -> [menit, ...] terurut (butuh MongoDB 6.3+ untuk $bitAnd)
+    per_jam = {"$map": {
+        "input": {"$objectToArray": {"$ifNull": [f"${FIELD_BITMAP}", {}]}},
+        "as": "j",
+        "in": {"$map": {
+            "input": {"$filter": {
+                "input": {"$range": [0, 60]},
+                "as": "m",
+                "cond": {"$ne": [{"$bitAnd": ["$$j.v", {"$toLong": {"$pow": [2, "$$m"]}}]}, 0]},
+            }},
+            "as": "m",
+            "in": {"$add": [{"$multiply": [{"$toInt": "$$j.k"}, 60]}, "$$m"]},
+        }},
+    }}
+    return {"$sortArray": {
+        "input": {"$reduce": {"input": per_jam, "initialValue": [], "in": {"$concatArrays": ["$$value", "$$this"]}}},
+        "sortBy": 1,
+    }}
+
+
+def pipeline_statistik(user_oid, dari, sampai):
+    """Statistik per hari untuk rentang tanggal 'YYYY-MM-DD' (inklusif), dihitung di server."""
+    return [
+        {"$match": {"user_id": user_oid, "tanggal": {"$gte": dari, "$lte": sampai}}},
+        {"$project": {"_id": 0, "tanggal": 1, "menit": _ekspresi_menit()}},
+        {"$set": {
+            "jeda": {"$map": {
+                "input": {"$range": [1, {"$max": [{"$size": "$menit"}, 1]}]},
+                "as": "i",
+                "in": {"$subtract": [
+                    {"$arrayElemAt": ["$menit", "$$i"]},
+                    {"$arrayElemAt": ["$menit", {"$subtract": ["$$i", 1]}]},
+                ]},
+            }},
+        }},
+        {"$project": {
+            "tanggal": 1,
+            "jumlahMinum": {"$size": "$menit"},
+            "pertama": {"$first": "$menit"},
+            "terakhir": {"$last": "$menit"},
+            "jedaRataRata": {"$avg": "$jeda"},
+            "jedaTerpanjang": {"$max": "$jeda"},
+        }},
+        {"$sort": {"tanggal": 1}},
+    ]
+
+
+def statistik_hari(tanggal, menit):
+    """Versi Python dari satu baris pipeline_statistik, untuk dokumen yang belum dimigrasi."""
+    jeda = [b - a for a, b in zip(menit, menit[1:])]
+    hari = {"tanggal": tanggal, "jumlahMinum": len(menit), "jedaRataRata": None, "jedaTerpanjang": None}
+    if menit:
+        hari["pertama"], hari["terakhir"] = menit[0], menit[-1]
+    if jeda:
+        hari["jedaRataRata"] = sum(jeda) / len(jeda)
+        hari["jedaTerpanjang"] = max(jeda)
+    return hari
+
+
+def ringkas_statistik(per_hari):
+    """Gabungkan hasil pipeline_statistik jadi ringkasan rentang."""
+    hari_aktif = [h for h in per_hari if h["jumlahMinum"]]
+    total = sum(h["jumlahMinum"] for h in hari_aktif)
+    jeda = [h for h in hari_aktif if h.get("jedaTerpanjang") is not None]
+    terpanjang = max(jeda, key=lambda h: h["jedaTerpanjang"], default=None)
+
+    for h in per_hari:
+        for key in ("pertama", "terakhir"):
+            if h.get(key) is not None:
+                h[key] = format_menit(h[key])
+        if h.get("jedaRataRata") is not None:
+            h["jedaRataRata"] = round(h["jedaRataRata"], 1)
+
+    return {
+        "hariTercatat": len(hari_aktif),
+        "totalMinum": total,
+        "rataRataPerHari": round(total / len(hari_aktif), 2) if hari_aktif else 0,
+        "jedaTerpanjang": {
+            "tanggal": terpanjang["tanggal"],
+            "menit": terpanjang["jedaTerpanjang"],
+        } if terpanjang else None,
+    }
+
+
+def migrasi(db, batch_size=1000):
+    """Pindahkan riwayatJamMinum lama ke bitmap per batch. Mengembalikan (dimigrasi, dilewati)."""
+    dimigrasi = dilewati = 0
+    last_id = None
+
+    while True:
+        query = {FIELD_LAMA: {"$exists": True}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        docs = list(db.riwayat_air.find(query, {FIELD_LAMA: 1}).sort("_id", 1).limit(batch_size))
+        if not docs:
+            break
+        last_id = docs[-1]["_id"]
+
+        ops = []
+        for doc in docs:
+            try:
+                bitmap = encode(doc[FIELD_LAMA] or [])
+            except (TypeError, ValueError):
+                dilewati += 1  # ada jam yang formatnya rusak, biarkan di format lama
+                continue
+            update = {"$unset": {FIELD_LAMA: ""}}
+            if bitmap:
+                update["$bit"] = {f"{FIELD_BITMAP}.{key}": {"or": bits} for key, bits in bitmap.items()}
+            # Filter pakai isi array lama: kalau berubah di tengah jalan, dokumen dilewati dan diulang di run berikutnya
+            ops.append(UpdateOne({"_id": doc["_id"], FIELD_LAMA: doc[FIELD_LAMA]}, update))
+
+        if ops:
+            result = db.riwayat_air.bulk_write(ops, ordered=False)
+            dimigrasi += result.modified_count
+            dilewati += len(ops) - result.modified_count
+
+    return dimigrasi, dilewati
+
+
+if __name__ == "__main__":
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--db", help="kalau nama database tidak ada di URI")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    dimigrasi, dilewati = migrasi(MongoClient(args.uri).get_default_database(args.db), args.batch_size)
+    print(f"✅ Migrasi riwayat_air: {dimigrasi} dokumen ke bitmap, {dilewati} dilewati")
@@ -0,0 +1,52 @@
+import sys
+
+# Modul yang wajib sudah di-patch gevent supaya pymongo & requests tidak memblokir hub
+MODUL_WAJIB_PATCH = ("socket", "ssl", "select", "threading", "time")
+
+
+def gevent_aktif():
+    if "gevent" not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched("socket")
+
+
+def run_blocking(fn, *args, **kwargs):
+    """Jalankan kerja CPU-bound (mis. bcrypt) di threadpool native gevent supaya event loop tidak macet.
+
+    Di worker sync langsung dipanggil biasa.
+    """
+    if not gevent_aktif():
+        return fn(*args, **kwargs)
+    import gevent
+    return gevent.get_hub().threadpool.apply(fn, args, kwargs)
+
+
+def hash_password(bcrypt, password):
+    return run_blocking(bcrypt.generate_password_hash, password).decode("utf-8")
+
+
+def check_password(bcrypt, hashed, password):
+    return run_blocking(bcrypt.check_password_hash, hashed, password)
+
+
+def cek_kompatibilitas_gevent():
+    """Kembalikan daftar masalah konfigurasi gevent (kosong = aman)."""
+    from gevent import monkey
+
+    masalah = [
+        f"modul {nama} belum di-monkey-patch"
+        for nama in MODUL_WAJIB_PATCH
+        if not monkey.is_module_patched(nama)
+    ]
+
+    import pymongo
+    if pymongo.version_tuple < (4, 0):
+        masalah.append(f"pymongo {pymongo.version} belum mendukung gevent dengan baik, butuh >= 4.0")
+
+    import greenlet
+    if int(greenlet.__version__.split(".")[0]) < 1:
+        # contextvars per-greenlet (request context Flask) baru ada di greenlet >= 1.0
+        masalah.append(f"greenlet {greenlet.__version__} tidak punya contextvars per-greenlet")
+
+    return masalah
@@ -0,0 +1,253 @@
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+
+# Entri riwayat_gula yang lebih tua dari cutoff dipindah ke satu dokumen per user per bulan:
+#   {user_id, bulan: "YYYY-MM", entries: [...], jumlahEntri, totalGula, totalSendokTeh, totalSendokMakan}
+ARSIP = "riwayat_gula_bulanan"
+FIELD_ENTRI = ("namaMakanan", "gulaPerBungkus", "jumlahBungkus", "isiPerBungkus",
+               "totalGula", "sendokTeh", "sendokMakan", "waktuInput")
+
+# Total bulanan selalu dihitung ulang dari isi entries, supaya tidak pernah melenceng
+TOTAL_BULANAN = {
+    "jumlahEntri": {"$size": "$entries"},
+    "totalGula": {"$sum": "$entries.totalGula"},
+    "totalSendokTeh": {"$sum": "$entries.sendokTeh"},
+    "totalSendokMakan": {"$sum": "$entries.sendokMakan"},
+    "updated_at": "$$NOW",
+}
+
+
+def ensure_arsip_indexes(db):
+    db[ARSIP].create_index([("user_id", 1), ("bulan", 1)], unique=True)
+    # Untuk update/hapus satu entri lama berdasarkan id-nya
+    db[ARSIP].create_index([("user_id", 1), ("entries._id", 1)])
+
+
+def cutoff_arsip(bulan, now=None):
+    # Awal bulan, `bulan` bulan sebelum bulan berjalan
+    now = now or datetime.utcnow()
+    tahun, bln = now.year, now.month - bulan
+    while bln <= 0:
+        bln += 12
+        tahun -= 1
+    return datetime(tahun, bln, 1)
+
+
+def perlu_baca_arsip(tanggal, bulan):
+    """False kalau tanggal yang diminta pasti belum pernah dikompaksi (tidak perlu query bucket).
+
+    Cutoff kompaksi hanya bergerak maju, jadi entri di bucket selalu < cutoff_arsip(bulan) saat ini,
+    selama GULA_ARSIP_BULAN tidak dinaikkan setelah bucket terisi.
+    """
+    return tanggal is None or tanggal < cutoff_arsip(bulan)
+
+
+def pipeline_entri_arsip(user_oid, bulan=None):
+    match = {"user_id": user_oid}
+    if bulan:
+        match["bulan"] = bulan
+    return [
+        {"$match": match},
+        {"$sort": {"bulan": 1}},
+        {"$unwind": "$entries"},
+        {"$replaceRoot": {"newRoot": {"$mergeObjects": ["$entries", {"user_id": "$user_id"}]}}},
+    ]
+
+
+def ambil_arsip(db, user_oid, session=None, tanggal=None, next_day=None, keyword=None):
+    pipeline = pipeline_entri_arsip(user_oid, tanggal.strftime("%Y-%m") if tanggal else None)
+    filter_entri = {}
+    if tanggal:
+        filter_entri["waktuInput"] = {"$gte": tanggal.isoformat(), "$lt": next_day.isoformat()}
+    if keyword:
+        filter_entri["namaMakanan"] = {"$regex": keyword, "$options": "i"}
+    if filter_entri:
+        pipeline.append({"$match": filter_entri})
+    return list(db[ARSIP].aggregate(pipeline, session=session))
+
+
+def gabung_dengan_arsip(live, arsip):
+    """Gabungkan hasil baca live lalu bucket (urutan baca itu penting), entri lama di depan.
+
+    Kompaksi bisa commit di antara dua query. Karena live dibaca duluan, entri yang baru dipindah
+    tetap ketemu di bucket; kalau ketemu di keduanya, yang dari bucket dibuang.
+    """
+    ids = {doc["_id"] for doc in live}
+    return [doc for doc in arsip if doc["_id"] not in ids] + live
+
+
+def update_arsip(db, user_oid, obj_id, fields, session=None):
+    # Satu update atomik: ganti entri lewat $map lalu hitung ulang total bulanan
+    return db[ARSIP].update_one(
+        {"user_id": user_oid, "entries._id": obj_id},
+        [
+            {"$set": {"entries": {"$map": {
+                "input": "$entries",
+                "as": "e",
+                "in": {"$cond": [
+                    {"$eq": ["$$e._id", obj_id]},
+                    {"$mergeObjects": ["$$e", {"$literal": fields}]},
+                    "$$e"
+                ]}
+            }}}},
+            {"$set": TOTAL_BULANAN},
+        ],
+        session=session
+    ).matched_count
+
+
+def hapus_arsip(db, user_oid, obj_id, session=None):
+    matched = db[ARSIP].update_one(
+        {"user_id": user_oid, "entries._id": obj_id},
+        [
+            {"$set": {"entries": {"$filter": {
+                "input": "$entries",
+                "cond": {"$ne": ["$$this._id", obj_id]}
+            }}}},
+            {"$set": TOTAL_BULANAN},
+        ],
+        session=session
+    ).matched_count
+    if matched:
+        db[ARSIP].delete_many({"user_id": user_oid, "jumlahEntri": 0}, session=session)
+    return matched
+
+
+def _pindahkan(db, user_oid, cutoff_str, batch_size, session):
+    # Dibaca di dalam transaksi, supaya update user yang bersamaan tidak tertimpa data lama
+    docs = list(db.riwayat_gula.find(
+        {"user_id": user_oid, "waktuInput": {"$lt": cutoff_str}},
+        session=session
+    ).limit(batch_size))
+
+    per_bulan = {}
+    for doc in docs:
+        entri = {"_id": doc["_id"]}
+        entri.update({f: doc.get(f) for f in FIELD_ENTRI})
+        per_bulan.setdefault(doc["waktuInput"][:7], []).append(entri)
+
+    for bulan, entries in per_bulan.items():
+        db[ARSIP].update_one(
+            {"user_id": user_oid, "bulan": bulan},
+            [
+                {"$set": {"entries": {"$concatArrays": [
+                    {"$ifNull": ["$entries", []]},
+                    {"$literal": entries}
+                ]}}},
+                {"$set": TOTAL_BULANAN},
+            ],
+            upsert=True,
+            session=session
+        )
+    if docs:
+        db.riwayat_gula.delete_many({"_id": {"$in": [d["_id"] for d in docs]}}, session=session)
+        # Sama seperti write di gula_routes: naikkan versi supaya tren_cache tidak memakai seri lama
+        db.gula_versi.update_one({"_id": user_oid}, {"$inc": {"v": 1}}, upsert=True, session=session)
+    return len(docs)
+
+
+def kompaksi(db, cutoff, batch_size=1000, transaksi=True):
+    """Pindahkan entri live dengan waktuInput < cutoff ke bucket bulanan. Mengembalikan jumlah entri.
+
+    transaksi=False hanya untuk database yang tidak dipakai request lain (mis. seed benchmark di
+    mongod standalone).
+    """
+    cutoff_str = cutoff.isoformat()
+    dipindah = 0
+
+    for user_oid in db.riwayat_gula.distinct("user_id"):
+        while True:
+            if not transaksi:
+                n = _pindahkan(db, user_oid, cutoff_str, batch_size, None)
+            else:
+                # Push ke bucket + hapus dari live harus atomik, kalau tidak bisa dobel/hilang
+                with db.client.start_session() as session:
+                    n = session.with_transaction(
+                        lambda s: _pindahkan(db, user_oid, cutoff_str, batch_size, s)
+                    )
+            dipindah += n
+            if n < batch_size:
+                break
+
+    return dipindah
+
+
+def laporan_storage(db):
+    laporan = {}
+    for name in ("riwayat_gula", ARSIP):
+        stats = db.command("collStats", name)
+        laporan[name] = {
+            "count": stats.get("count", 0),
+            "size": stats.get("size", 0),
+            "storageSize": stats.get("storageSize", 0),
+            "totalIndexSize": stats.get("totalIndexSize", 0),
+            "indexSizes": stats.get("indexSizes", {}),
+        }
+    arsip = db[ARSIP].aggregate([{"$group": {"_id": None, "entri": {"$sum": "$jumlahEntri"}}}])
+    laporan[ARSIP]["entries"] = next(arsip, {}).get("entri", 0)
+    return laporan
+
+
+class ArsipCompactor:
+    """Thread background yang menjalankan kompaksi berkala. Antar worker dikoordinasi lewat lease di Mongo."""
+
+    LOCK_ID = "gula_arsip"
+
+    def __init__(self, db, bulan=3, interval_seconds=6 * 3600, batch_size=1000):
+        self.db = db
+        self.bulan = bulan
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _ambil_lease(self):
+        now = datetime.utcnow()
+        try:
+            self.db.job_locks.find_one_and_update(
+                {"_id": self.LOCK_ID, "$or": [{"until": {"$lt": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "until": now + timedelta(seconds=self.interval_seconds)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False  # lease masih dipegang worker lain
+
+    def run_once(self):
+        if not self._ambil_lease():
+            return None
+        mulai = time.perf_counter()
+        dipindah = kompaksi(self.db, cutoff_arsip(self.bulan), self.batch_size)
+        print(f"📦 Kompaksi riwayat_gula: {dipindah} entri dipindah ke {ARSIP} "
+              f"({time.perf_counter() - mulai:.1f} s)")
+        return dipindah
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"❌ Kompaksi riwayat_gula gagal: {e}")
+            self._stop.wait(self.interval_seconds)
+
+    def _replica_set(self):
+        hello = self.db.command("hello")
+        return bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+
+    def start(self):
+        # Kompaksi pakai transaksi; di mongod standalone setiap run pasti gagal
+        if not self._replica_set():
+            print("⚠️ Kompaksi riwayat_gula tidak dijalankan: MongoDB bukan replica set/sharded cluster")
+            return False
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="gula-arsip", daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,191 @@
+import numpy as np
+from utils.gula_arsip import ARSIP, pipeline_entri_arsip
+
+# Batas harian default: 50 g gula (rekomendasi WHO/Kemenkes)
+BATAS_GULA_HARIAN = 50.0
+ANOMALI_Z = 2.5
+# waktuInput diisi client, jadi riwayat yang dihitung dibatasi 10 tahun ke belakang
+MAKS_HARI_RIWAYAT = 3660
+
+
+def pipeline_seri_harian(user_oid, dari=None, sampai=None):
+    """Total per hari. `dari`/`sampai` (YYYY-MM-DD, inklusif) membatasi rentang waktuInput."""
+    def angka(field):
+        return {"$convert": {"input": f"${field}", "to": "double", "onError": 0, "onNull": 0}}
+
+    match = {"user_id": user_oid}
+    rentang = {}
+    if dari:
+        rentang["$gte"] = dari
+    if sampai:
+        rentang["$lt"] = str(np.datetime64(sampai, "D") + 1)
+    if rentang:
+        match["waktuInput"] = rentang
+    arsip = pipeline_entri_arsip(user_oid)
+    if rentang:
+        arsip.append({"$match": {"waktuInput": rentang}})
+
+    # Satu query: jumlahkan per hari langsung di Mongo, hanya field yang dibutuhkan
+    return [
+        {"$match": match},
+        # Entri lama dari bucket bulanan ikut dihitung
+        {"$unionWith": {"coll": ARSIP, "pipeline": arsip}},
+        # Kompaksi bisa commit di antara scan live dan scan bucket, jadi entri yang sama
+        # bisa terbaca dua kali; satu baris per _id sebelum dijumlahkan per hari
+        {"$group": {
+            "_id": "$_id",
+            "waktuInput": {"$first": "$waktuInput"},
+            "totalGula": {"$first": "$totalGula"},
+            "sendokTeh": {"$first": "$sendokTeh"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "tanggal": {"$substrBytes": ["$waktuInput", 0, 10]},
+            "totalGula": angka("totalGula"),
+            "sendokTeh": angka("sendokTeh"),
+        }},
+        {"$group": {
+            "_id": "$tanggal",
+            "totalGula": {"$sum": "$totalGula"},
+            "sendokTeh": {"$sum": "$sendokTeh"},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+
+def susun_seri(seri):
+    """Hasil pipeline_seri_harian -> (tanggal, totalGula, sendokTeh) array NumPy yang ringkas.
+
+    Hanya hari yang ada entrinya, jadi ini yang di-cache, bukan hasil hitung_tren per parameter.
+    """
+    tanggal = np.array([s["_id"] for s in seri], dtype="datetime64[D]")
+    gula = np.array([s["totalGula"] for s in seri], dtype=np.float64)
+    sendok = np.array([s["sendokTeh"] for s in seri], dtype=np.float64)
+    return tanggal, gula, sendok
+
+
+def ukuran_seri(seri):
+    return sum(a.nbytes for a in seri)
+
+
+def _rolling_mean(x, window):
+    c = np.concatenate(([0.0], np.cumsum(x)))
+    out = np.empty_like(x)
+    head = min(window, len(x))
+    # Hari-hari awal (belum genap satu window) pakai rata-rata kumulatif
+    out[:head] = c[1:head + 1] / np.arange(1, head + 1)
+    out[head:] = (c[head + 1:] - c[1:len(x) - head + 1]) / window
+    return out
+
+
+def _trailing_stats(x, window):
+    # Mean & std dari `window` hari SEBELUM hari ini (hari ini tidak ikut dihitung)
+    c1 = np.concatenate(([0.0], np.cumsum(x)))
+    c2 = np.concatenate(([0.0], np.cumsum(x * x)))
+    idx = np.arange(len(x))
+    lo = np.maximum(idx - window, 0)
+    n = idx - lo
+    s1 = c1[idx] - c1[lo]
+    s2 = c2[idx] - c2[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s1 / n
+        var = s2 / n - mean * mean
+    return mean, np.sqrt(np.clip(var, 0, None)), n
+
+
+def _streaks(over):
+    padded = np.concatenate(([0], over.astype(np.int8), [0]))
+    edges = np.diff(padded)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+    terpanjang = int(lengths.max()) if len(lengths) else 0
+    sekarang = int(lengths[-1]) if len(lengths) and over[-1] else 0
+    return sekarang, terpanjang
+
+
+def hitung_tren(seri, batas=BATAS_GULA_HARIAN, window=7, hari=90, minggu=12, sampai=None):
+    """`seri` adalah hasil susun_seri (urut per tanggal, tanpa hari kosong).
+
+    `sampai` (YYYY-MM-DD) memperpanjang seri sampai hari ini supaya streak berjalan ikut putus
+    kalau user belum input lagi.
+    """
+    tanggal, gula_isi, sendok_isi = seri
+    if not len(tanggal):
+        return {"harian": [], "mingguan": [], "streak": {"sekarang": 0, "terpanjang": 0}}
+
+    start = tanggal[0]
+    akhir = tanggal[-1]
+    if sampai is not None:
+        akhir = max(akhir, np.datetime64(sampai, "D"))
+    n = int((akhir - start).astype(int)) + 1
+    pos = (tanggal - start).astype(int)
+
+    # Isi hari yang tidak ada entri dengan 0
+    gula = np.zeros(n)
+    sendok = np.zeros(n)
+    gula[pos] = gula_isi
+    sendok[pos] = sendok_isi
+
+    rata_gula = _rolling_mean(gula, window)
+    rata_sendok = _rolling_mean(sendok, window)
+
+    # Z-score hanya antar hari yang ada entrinya: hari kosong bukan "0 g", tapi tidak tercatat
+    mean, std, jumlah = _trailing_stats(gula_isi, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (gula_isi - mean) / std
+    anomali = np.zeros(n, dtype=bool)
+    anomali[pos] = (jumlah >= window) & (std > 0) & (np.abs(z) > ANOMALI_Z)
+
+    sekarang, terpanjang = _streaks(gula > batas)
+
+    # Minggu mulai Senin (1970-01-01 adalah Kamis, jadi geser 3 hari)
+    semua_tanggal = start + np.arange(n)
+    minggu_ke = (semua_tanggal.astype(int) + 3) // 7
+    minggu_ke = minggu_ke - minggu_ke[0]
+    total_minggu = np.bincount(minggu_ke, weights=gula)
+    sendok_minggu = np.bincount(minggu_ke, weights=sendok)
+    # Minggu pertama (mulai di tengah minggu) dan minggu berjalan belum 7 hari,
+    # jadi tidak dibandingkan dengan minggu penuh
+    lengkap = np.bincount(minggu_ke) == 7
+    perubahan = np.full(len(total_minggu), np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        perubahan[1:] = np.where(
+            (total_minggu[:-1] > 0) & lengkap[:-1] & lengkap[1:],
+            (total_minggu[1:] - total_minggu[:-1]) / total_minggu[:-1] * 100,
+            np.nan,
+        )
+    senin_awal = semua_tanggal[0] - ((semua_tanggal[0].astype(int) + 3) % 7)
+    senin = senin_awal + np.arange(len(total_minggu)) * 7
+
+    h0 = max(n - hari, 0)
+    harian = [
+        {
+            "tanggal": str(semua_tanggal[i]),
+            "totalGula": round(float(gula[i]), 2),
+            "sendokTeh": round(float(sendok[i]), 2),
+            "rataGula": round(float(rata_gula[i]), 2),
+            "rataSendokTeh": round(float(rata_sendok[i]), 2),
+            "melebihiBatas": bool(gula[i] > batas),
+            "anomali": bool(anomali[i]),
+        }
+        for i in range(h0, n)
+    ]
+
+    m0 = max(len(total_minggu) - minggu, 0)
+    mingguan = [
+        {
+            "mingguMulai": str(senin[i]),
+            "totalGula": round(float(total_minggu[i]), 2),
+            "sendokTeh": round(float(sendok_minggu[i]), 2),
+            "lengkap": bool(lengkap[i]),
+            "perubahanPersen": None if np.isnan(perubahan[i]) else round(float(perubahan[i]), 1),
+        }
+        for i in range(m0, len(total_minggu))
+    ]
+
+    return {
+        "harian": harian,
+        "mingguan": mingguan,
+        "streak": {"sekarang": sekarang, "terpanjang": terpanjang},
+    }
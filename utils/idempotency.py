@@ -0,0 +1,142 @@
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, jsonify, make_response, current_app
+from flask_jwt_extended import get_jwt_identity
+from pymongo.errors import DuplicateKeyError
+from utils.lru_cache import LRUCache
+from utils.mongo_routing import get_db, get_session
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# Fast path untuk key yang sering di-retry, sebelum ke Mongo
+_hot_keys = LRUCache(maxsize=4096, ttl=600)
+
+# Lama lease record yang masih diproses. Lewat dari ini (mis. worker dibunuh timeout gunicorn),
+# retry berikutnya boleh mengambil alih record-nya.
+_lock_seconds = 60
+
+
+def init_idempotency(db, ttl_seconds, lock_seconds=60):
+    global _lock_seconds
+    _lock_seconds = lock_seconds
+    _hot_keys.ttl = min(ttl_seconds, 600)
+    existing = db.idempotency_keys.index_information().get("created_at_1")
+    if existing and existing.get("expireAfterSeconds") != ttl_seconds:
+        # create_index dengan TTL berbeda akan gagal (IndexOptionsConflict), ubah lewat collMod
+        db.command("collMod", "idempotency_keys", index={
+            "keyPattern": {"created_at": 1},
+            "expireAfterSeconds": ttl_seconds,
+        })
+    else:
+        db.idempotency_keys.create_index("created_at", expireAfterSeconds=ttl_seconds)
+
+
+def _fingerprint():
+    h = hashlib.sha256()
+    h.update(request.method.encode())
+    h.update(request.path.encode())
+    h.update(request.get_data())
+    return h.hexdigest()
+
+
+def _replay(record):
+    response = current_app.response_class(
+        record["body"], status=record["status"], mimetype=record["mimetype"]
+    )
+    response.headers[REPLAY_HEADER] = "true"
+    return response
+
+
+def _ambil_alih(db, record_id, fingerprint, token, session):
+    # Hanya berhasil kalau record masih pending dan lease-nya sudah habis
+    now = datetime.utcnow()
+    return db.idempotency_keys.find_one_and_update(
+        {
+            "_id": record_id,
+            "fingerprint": fingerprint,
+            "status": None,
+            "$or": [{"locked_until": {"$lt": now}}, {"locked_until": {"$exists": False}}],
+        },
+        {"$set": {"lock_token": token, "locked_until": now + timedelta(seconds=_lock_seconds)}},
+        session=session
+    ) is not None
+
+
+def idempotent(view):
+    """Simpan response pertama untuk setiap Idempotency-Key dan putar ulang saat request di-retry.
+
+    Response 5xx dan exception (termasuk PyMongoError yang di-raise ulang oleh route) tidak disimpan,
+    supaya retry dengan key yang sama benar-benar dicoba lagi.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"success": False, "message": "Idempotency-Key terlalu panjang"}), 400
+
+        record_id = f"{get_jwt_identity()}:{key}"
+        fingerprint = _fingerprint()
+
+        cached = _hot_keys.get(record_id)
+        if cached is not None:
+            if cached["fingerprint"] != fingerprint:
+                return jsonify({"success": False, "message": "Idempotency-Key sudah dipakai untuk request lain"}), 422
+            return _replay(cached)
+
+        db = get_db()
+        session = get_session()
+        token = uuid.uuid4().hex
+        now = datetime.utcnow()
+        try:
+            db.idempotency_keys.insert_one({
+                "_id": record_id,
+                "fingerprint": fingerprint,
+                "status": None,
+                "lock_token": token,
+                "locked_until": now + timedelta(seconds=_lock_seconds),
+                "created_at": now
+            }, session=session)
+        except DuplicateKeyError:
+            record = db.idempotency_keys.find_one({"_id": record_id}, session=session)
+            if record is None:
+                # Baru saja expired/dihapus, anggap request baru
+                return wrapper(*args, **kwargs)
+            if record["fingerprint"] != fingerprint:
+                return jsonify({"success": False, "message": "Idempotency-Key sudah dipakai untuk request lain"}), 422
+            if record["status"] is not None:
+                _hot_keys.set(record_id, record)
+                return _replay(record)
+            if not _ambil_alih(db, record_id, fingerprint, token, session):
+                return jsonify({"success": False, "message": "Request dengan key ini masih diproses"}), 409
+
+        owned = {"_id": record_id, "lock_token": token}
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            db.idempotency_keys.delete_one(owned, session=session)
+            raise
+
+        if response.status_code >= 500:
+            # Error server tidak disimpan, supaya retry bisa mencoba lagi
+            db.idempotency_keys.delete_one(owned, session=session)
+            return response
+
+        record = {
+            "fingerprint": fingerprint,
+            "status": response.status_code,
+            "mimetype": response.mimetype,
+            "body": response.get_data()
+        }
+        # Kalau lease sudah diambil alih request lain, hasil request itu yang disimpan
+        db.idempotency_keys.update_one(owned, {"$set": record, "$unset": {"locked_until": ""}}, session=session)
+        _hot_keys.set(record_id, record)
+        return response
+
+    return wrapper
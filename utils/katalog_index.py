@@ -0,0 +1,264 @@
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timedelta
+from models.katalog_model import normalisasi_nama
+
+# Format snapshot (little endian, semua section rata 8 byte):
+#   header  : magic(8s) count(I) reserved(I) version_ms(q)
+#   offsets : (count + 1) x uint32 -> posisi record di blob
+#   gula    : count x double (NaN = kosong)
+#   isi     : count x double (NaN = kosong)
+#   ids     : count x 12 byte ObjectId
+#   blob    : record b"<nama_key>\t<nama>" urut berdasarkan nama_key
+MAGIC = b"SKKATLG1"
+HEADER = struct.Struct("<8sIIq")
+EPOCH = datetime(1970, 1, 1)
+
+
+def _to_ms(dt):
+    if dt is None:
+        return -1
+    return (dt - EPOCH) // timedelta(milliseconds=1)
+
+
+def _from_ms(ms):
+    if ms < 0:
+        return None
+    return EPOCH + timedelta(milliseconds=ms)
+
+
+def _pad8(n):
+    return (8 - n % 8) % 8
+
+
+def _num(value):
+    return math.nan if value is None else float(value)
+
+
+def _out(value):
+    return None if math.isnan(value) else value
+
+
+def write_snapshot(path, docs, version):
+    rows = sorted(
+        (d["nama_key"].encode("utf-8") + b"\t" + d["nama"].encode("utf-8"), d)
+        for d in docs
+    )
+    count = len(rows)
+
+    offsets = [0]
+    for record, _ in rows:
+        offsets.append(offsets[-1] + len(record))
+
+    parts = [HEADER.pack(MAGIC, count, 0, _to_ms(version))]
+    offsets_bytes = struct.pack(f"<{count + 1}I", *offsets)
+    parts.append(offsets_bytes + b"\0" * _pad8(len(offsets_bytes)))
+    parts.append(struct.pack(f"<{count}d", *(_num(d.get("gulaPerSaji")) for _, d in rows)))
+    parts.append(struct.pack(f"<{count}d", *(_num(d.get("isiPerSaji")) for _, d in rows)))
+    ids_bytes = b"".join(d["_id"].binary for _, d in rows)
+    parts.append(ids_bytes + b"\0" * _pad8(len(ids_bytes)))
+    parts.append(b"".join(record for record, _ in rows))
+
+    # Tulis ke file sementara lalu rename atomik, worker lain tidak pernah baca file setengah jadi
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        for part in parts:
+            f.write(part)
+    os.replace(tmp_path, path)
+
+
+class _Snapshot:
+    def __init__(self, mm):
+        if len(mm) < HEADER.size:
+            raise ValueError("Snapshot katalog terpotong")
+        magic, count, _, version_ms = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError("Snapshot katalog tidak valid")
+
+        self.mm = mm
+        self.count = count
+        self.version = _from_ms(version_ms)
+
+        pos = HEADER.size
+        self.offsets_at = pos
+        pos += (count + 1) * 4
+        pos += _pad8(pos)
+        self.gula_at = pos
+        pos += count * 8
+        self.isi_at = pos
+        pos += count * 8
+        self.ids_at = pos
+        pos += count * 12
+        pos += _pad8(pos)
+        self.blob_at = pos
+
+        # File setengah jadi/terpotong: ukuran harus pas dengan offset record terakhir
+        if self.offsets_at + (count + 1) * 4 > len(mm) or \
+                self.blob_at + struct.unpack_from("<I", mm, self.offsets_at + count * 4)[0] != len(mm):
+            raise ValueError("Snapshot katalog terpotong")
+
+    def record(self, i):
+        start, end = struct.unpack_from("<2I", self.mm, self.offsets_at + i * 4)
+        return self.mm[self.blob_at + start:self.blob_at + end]
+
+    def object_id(self, i):
+        return self.mm[self.ids_at + i * 12:self.ids_at + (i + 1) * 12]
+
+    def gula(self, i):
+        return _out(struct.unpack_from("<d", self.mm, self.gula_at + i * 8)[0])
+
+    def isi(self, i):
+        return _out(struct.unpack_from("<d", self.mm, self.isi_at + i * 8)[0])
+
+    def lower_bound(self, prefix):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.record(mid) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+class PrefixIndex:
+    """Index prefix read-only di atas snapshot mmap + overlay kecil untuk perubahan terbaru."""
+
+    def __init__(self, path):
+        self.path = path
+        self.version = None
+        self._snapshot = None
+        self._mtime = None
+        self._overlay = {}
+
+    def load(self):
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            mtime = os.fstat(f.fileno()).st_mtime_ns
+
+        # mmap lama tidak di-close manual, dibiarkan GC supaya search yang sedang jalan aman
+        snapshot = _Snapshot(mm)
+        self._snapshot = snapshot
+        self._mtime = mtime
+        self.version = snapshot.version
+        self._overlay = {}
+
+    def snapshot_changed(self):
+        try:
+            return os.stat(self.path).st_mtime_ns != self._mtime
+        except FileNotFoundError:
+            return False
+
+    def overlay_size(self):
+        return len(self._overlay)
+
+    def apply_changes(self, docs):
+        # Overlay di-copy lalu ditukar, supaya search di thread lain tidak melihat dict yang sedang diubah
+        overlay = dict(self._overlay)
+        for d in docs:
+            key = d["_id"].binary
+            if d.get("deleted"):
+                overlay[key] = None
+            else:
+                overlay[key] = {
+                    "_id": str(d["_id"]),
+                    "nama_key": d["nama_key"],
+                    "nama": d["nama"],
+                    "gulaPerSaji": d.get("gulaPerSaji"),
+                    "isiPerSaji": d.get("isiPerSaji"),
+                }
+            if self.version is None or d["updated_at"] > self.version:
+                self.version = d["updated_at"]
+        self._overlay = overlay
+
+    def search(self, prefix, limit=10):
+        key = normalisasi_nama(prefix)
+        prefix_bytes = key.encode("utf-8")
+        snapshot, overlay = self._snapshot, self._overlay
+        results = []
+
+        if snapshot is not None:
+            i = snapshot.lower_bound(prefix_bytes)
+            while i < snapshot.count and len(results) < limit:
+                record = snapshot.record(i)
+                if not record.startswith(prefix_bytes):
+                    break
+                oid = snapshot.object_id(i)
+                if oid not in overlay:
+                    nama_key, nama = record.decode("utf-8").split("\t", 1)
+                    results.append({
+                        "_id": oid.hex(),
+                        "nama_key": nama_key,
+                        "nama": nama,
+                        "gulaPerSaji": snapshot.gula(i),
+                        "isiPerSaji": snapshot.isi(i),
+                    })
+                i += 1
+
+        for item in overlay.values():
+            if item is not None and item["nama_key"].startswith(key):
+                results.append(dict(item))
+
+        results.sort(key=lambda x: x["nama_key"])
+        for item in results:
+            del item["nama_key"]
+        return results[:limit]
+
+
+class KatalogIndex:
+    def __init__(self, model, path, refresh_seconds=30, overlay_max=500):
+        self.model = model
+        self.index = PrefixIndex(path)
+        self.refresh_seconds = refresh_seconds
+        self.overlay_max = overlay_max
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def load_or_build(self):
+        if os.path.exists(self.index.path):
+            try:
+                self.index.load()
+            except ValueError as e:
+                # Sisa snapshot format lama / rusak di path bersama, bangun ulang saja
+                print(f"⚠️ Snapshot katalog {self.index.path} diabaikan ({e}), dibangun ulang")
+                self.rebuild()
+                return
+            self.refresh(force=True)
+        else:
+            self.rebuild()
+
+    def rebuild(self):
+        # Versi diambil sebelum scan, perubahan selama scan akan ikut diambil lagi oleh refresh
+        version = self.model.latest_update()
+        write_snapshot(self.index.path, self.model.find_all_active(), version)
+        self.index.load()
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_check < self.refresh_seconds:
+            return
+        if not self._lock.acquire(blocking=False):
+            return  # thread lain sedang refresh, pakai index yang ada dulu
+        try:
+            self._last_check = now
+            if self.index.snapshot_changed():
+                self.index.load()
+            changed = list(self.model.find_changed_since(self.index.version))
+            if changed:
+                self.index.apply_changes(changed)
+            if self.index.overlay_size() > self.overlay_max:
+                version = self.model.latest_update()
+                write_snapshot(self.index.path, self.model.find_all_active(), version)
+                self.index.load()
+                self.index.apply_changes(self.model.find_changed_since(self.index.version))
+        finally:
+            self._lock.release()
+
+    def search(self, prefix, limit=10):
+        self.refresh()
+        return self.index.search(prefix, limit)
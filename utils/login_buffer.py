@@ -0,0 +1,137 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+
+POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class LoginEventBuffer:
+    """Buffer in-process untuk event login, di-flush ke Mongo per batch (ukuran atau waktu)."""
+
+    def __init__(self, flush_fn, max_size=10000, batch_size=500, flush_seconds=2.0,
+                 policy="drop_oldest", block_seconds=0.5):
+        if policy not in POLICIES:
+            raise ValueError(f"Policy buffer tidak dikenal: {policy}")
+        self.flush_fn = flush_fn
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.policy = policy
+        self.block_seconds = block_seconds
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self._stats = {
+            "enqueued": 0,
+            "flushed": 0,
+            "dropped": 0,
+            "flush_batches": 0,
+            "flush_errors": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    def _ensure_thread(self):
+        # Thread dibuat lazy di tiap worker (thread tidak ikut ter-fork)
+        pid = os.getpid()
+        if self._pid != pid:
+            self._pid = pid
+            self._queue.clear()
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name="login-buffer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def put(self, event):
+        """True kalau event diterima, False kalau dibuang karena buffer penuh."""
+        with self._cond:
+            self._ensure_thread()
+            if len(self._queue) >= self.max_size:
+                if self.policy == "drop_oldest":
+                    self._queue.popleft()
+                    self._stats["dropped"] += 1
+                elif self.policy == "block":
+                    deadline = time.monotonic() + self.block_seconds
+                    while len(self._queue) >= self.max_size:
+                        sisa = deadline - time.monotonic()
+                        if sisa <= 0 or not self._cond.wait(sisa):
+                            break
+                    if len(self._queue) >= self.max_size:
+                        self._stats["dropped"] += 1
+                        return False
+                else:
+                    self._stats["dropped"] += 1
+                    return False
+
+            self._queue.append(event)
+            self._stats["enqueued"] += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+            return True
+
+    def _take_batch(self):
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popleft())
+        return batch
+
+    def _flush_batch(self, batch):
+        mulai = time.perf_counter()
+        try:
+            self.flush_fn(batch)
+        except Exception as e:
+            print(f"❌ Flush login buffer gagal ({len(batch)} event): {e}")
+            with self._cond:
+                self._stats["flush_errors"] += 1
+                # Kembalikan ke depan antrean selama masih muat, sisanya dihitung dropped
+                ruang = max(self.max_size - len(self._queue), 0)
+                kembali = batch[-ruang:] if ruang else []
+                self._queue.extendleft(reversed(kembali))
+                self._stats["dropped"] += len(batch) - len(kembali)
+            return False
+
+        with self._cond:
+            self._stats["flushed"] += len(batch)
+            self._stats["flush_batches"] += 1
+            self._stats["last_flush_ms"] = round((time.perf_counter() - mulai) * 1000, 2)
+            self._cond.notify_all()  # bangunkan put() yang menunggu (policy block)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._queue) < self.batch_size:
+                    self._cond.wait(self.flush_seconds)
+                if self._closed and not self._queue:
+                    return
+                batch = self._take_batch()
+            if batch and not self._flush_batch(batch):
+                # Mongo lambat/error: jangan langsung retry terus-terusan
+                time.sleep(min(self.flush_seconds, 5))
+
+    def flush(self):
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch or not self._flush_batch(batch):
+                return
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=10)
+        # Sisa yang belum sempat di-flush thread background
+        self.flush()
+
+    def metrics(self):
+        with self._cond:
+            return dict(self._stats, queue_size=len(self._queue), policy=self.policy)
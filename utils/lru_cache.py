@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Cache in-process yang thread-safe, dengan batas jumlah item, TTL opsional, dan batas byte opsional.
+
+    Batas byte butuh `sizeof(value)`; item yang lebih besar dari `maxbytes` tidak disimpan.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, maxbytes=None, sizeof=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self._bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _size(self, value):
+        return self.sizeof(value) if self.maxbytes is not None else 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                self._bytes -= self._size(value)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        size = self._size(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= self._size(old[0])
+            if self.maxbytes is not None and size > self.maxbytes:
+                return
+            self._data[key] = (value, expires_at)
+            self._bytes += size
+            while len(self._data) > self.maxsize or (self.maxbytes is not None and self._bytes > self.maxbytes):
+                _, (evicted, _) = self._data.popitem(last=False)
+                self._bytes -= self._size(evicted)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return default
+            self._bytes -= self._size(entry[0])
+            return entry[0]
+
+    def __len__(self):
+        return len(self._data)
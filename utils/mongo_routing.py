@@ -0,0 +1,159 @@
+import base64
+from bson import json_util
+from flask import request, g, current_app
+from pymongo.read_preferences import (
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+    Nearest,
+)
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+
+# Header untuk membawa cluster time antar request (read-your-own-writes)
+CLUSTER_TIME_HEADER = "X-Cluster-Time"
+# Penanda di environ untuk sub-request /api/batch, session-nya milik request induk
+BATCH_SUBREQUEST_KEY = "scansek.batch_subrequest"
+
+_READ_MODES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def build_read_preference(mode, max_staleness=-1):
+    mode_cls = _READ_MODES.get(mode)
+    if mode_cls is None:
+        raise ValueError(f"Read preference tidak dikenal: {mode}")
+    if mode_cls is Primary:
+        return Primary()
+    return mode_cls(max_staleness=max_staleness)
+
+
+def build_read_concern(read_preference):
+    # Causal consistency (read-your-own-writes) hanya dijamin MongoDB kalau read dari secondary
+    # memakai read concern majority (dan write memakai w=majority), termasuk saat failover/rollback
+    if read_preference is None or read_preference.mode == Primary().mode:
+        return None
+    return ReadConcern("majority")
+
+
+def build_write_concern(config):
+    w = config.get("MONGO_WRITE_CONCERN_W", "majority")
+    if isinstance(w, str) and w.isdigit():
+        w = int(w)
+    return WriteConcern(
+        w=w,
+        j=config.get("MONGO_WRITE_CONCERN_J", True),
+        wtimeout=config.get("MONGO_WRITE_CONCERN_WTIMEOUT_MS", 5000),
+    )
+
+
+def encode_cluster_time(session):
+    if session is None or session.cluster_time is None:
+        return None
+    payload = json_util.dumps({
+        "clusterTime": session.cluster_time,
+        "operationTime": session.operation_time,
+    })
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cluster_time(token):
+    try:
+        data = json_util.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        return data.get("clusterTime"), data.get("operationTime")
+    except Exception:
+        # Token rusak/dimanipulasi -> anggap tidak ada, bukan error
+        return None, None
+
+
+def init_mongo_routing(app, mongo):
+    max_staleness = app.config.get("MONGO_MAX_STALENESS_SECONDS", -1)
+    read_prefs = {
+        endpoint: build_read_preference(mode, max_staleness)
+        for endpoint, mode in app.config.get("MONGO_READ_PREFERENCES", {}).items()
+    }
+    app.extensions["mongo_routing"] = {
+        "mongo": mongo,
+        "read_preferences": read_prefs,
+        "write_concern": build_write_concern(app.config),
+    }
+
+    @app.after_request
+    def attach_cluster_time(response):
+        token = encode_cluster_time(g.get("mongo_session"))
+        if token:
+            response.headers[CLUSTER_TIME_HEADER] = token
+        return response
+
+    @app.teardown_request
+    def end_mongo_session(exc):
+        if request.environ.get(BATCH_SUBREQUEST_KEY):
+            return
+        session = g.pop("mongo_session", None)
+        if session is not None:
+            session.end_session()
+
+
+def _routing():
+    return current_app.extensions["mongo_routing"]
+
+
+def get_read_preference(endpoint=None):
+    endpoint = endpoint or request.endpoint
+    return _routing()["read_preferences"].get(endpoint, Primary())
+
+
+def get_db(endpoint=None):
+    routing = _routing()
+    read_preference = get_read_preference(endpoint)
+    return routing["mongo"].db.with_options(
+        read_preference=read_preference,
+        read_concern=build_read_concern(read_preference),
+        write_concern=routing["write_concern"],
+    )
+
+
+def get_session():
+    # Satu causal session per request, dilanjutkan dari cluster time client
+    session = g.get("mongo_session")
+    if session is None:
+        session = _routing()["mongo"].cx.start_session(causal_consistency=True)
+        token = request.headers.get(CLUSTER_TIME_HEADER)
+        if token:
+            cluster_time, operation_time = decode_cluster_time(token)
+            try:
+                if cluster_time is not None:
+                    session.advance_cluster_time(cluster_time)
+                if operation_time is not None:
+                    session.advance_operation_time(operation_time)
+            except (TypeError, ValueError):
+                pass
+        g.mongo_session = session
+    return session
+
+
+def start_child_session():
+    # ClientSession tidak thread-safe: query paralel pakai session sendiri
+    # yang dimulai dari cluster time session request
+    parent = get_session()
+    child = _routing()["mongo"].cx.start_session(causal_consistency=True)
+    if parent.cluster_time is not None:
+        child.advance_cluster_time(parent.cluster_time)
+    if parent.operation_time is not None:
+        child.advance_operation_time(parent.operation_time)
+    return child
+
+
+def merge_child_session(child):
+    parent = get_session()
+    if child.cluster_time is not None:
+        parent.advance_cluster_time(child.cluster_time)
+    if child.operation_time is not None:
+        parent.advance_operation_time(child.operation_time)
+    child.end_session()
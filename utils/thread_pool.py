@@ -0,0 +1,22 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def get_executor(max_workers=8):
+    # Dibuat lazy per proses: thread tidak ikut ter-fork dari master gunicorn
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix="scansek-io"
+                )
+                _executor_pid = pid
+    return _executor
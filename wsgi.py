@@ -1,4 +1,11 @@
+import os
+
+# Monkey-patch harus paling awal, sebelum pymongo/requests/threading ter-import
+# (penting kalau gunicorn jalan dengan --preload)
+if os.getenv("GUNICORN_WORKER_CLASS", "sync") == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
 from app import create_app
 
 app = create_app()
-